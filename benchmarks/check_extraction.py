@@ -0,0 +1,92 @@
+"""
+Regression check for article extraction against saved pages.
+
+Each fixtures/articles/<name>.html is run through extraction.extract_html
+and compared with the result saved next to it in <name>.json (title, text,
+markdown, images, ok and error). The saved results were first produced by
+the markdownify-based renderer that ArticleRenderer replaced, so a change to
+the renderer that alters its output shows up here as a diff:
+
+    python benchmarks/check_extraction.py
+    python benchmarks/check_extraction.py --update
+
+The run fails (exit status 1) when any page differs from its saved result.
+--update rewrites the saved results from the current output instead; only
+use it when the difference is intended, and review the JSON diff.
+"""
+
+import argparse
+import difflib
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from extraction import extract_html  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "articles"
+# Pages are extracted as if served from here, so relative image URLs resolve
+BASE_URL = "https://www.example.com/2025/03/"
+MIN_LENGTH = 300
+MAX_IMAGES = 3
+FIELDS = ("ok", "error", "title", "text", "markdown", "images")
+
+
+def extract(page: Path) -> dict:
+    """The compared fields of a fixture page's extraction result."""
+    result = extract_html(page.read_bytes(), BASE_URL + page.name, None, MIN_LENGTH, MAX_IMAGES)
+    return {field: result.get(field) for field in FIELDS}
+
+
+def differences(expected: dict, actual: dict, name: str) -> list:
+    """Unified diff lines for every field where actual differs from expected."""
+    lines = []
+    for field in FIELDS:
+        if expected.get(field) == actual.get(field):
+            continue
+        old, new = expected.get(field), actual.get(field)
+        if not isinstance(old, str) or not isinstance(new, str):
+            old, new = json.dumps(old, indent=2), json.dumps(new, indent=2)
+        lines.extend(difflib.unified_diff(
+            old.splitlines(), new.splitlines(),
+            f"{name} {field} (expected)", f"{name} {field} (actual)", lineterm="",
+        ))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="rewrite the saved results from the current output")
+    parser.add_argument("pages", nargs="*", help="fixture names to check (default: all)")
+    args = parser.parse_args()
+
+    pages = sorted(FIXTURES.glob("*.html"))
+    if args.pages:
+        pages = [page for page in pages if page.stem in args.pages]
+    failures = []
+    for page in pages:
+        actual = extract(page)
+        saved = page.with_suffix(".json")
+        if args.update:
+            saved.write_text(json.dumps(actual, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            print(f"updated {saved.name}")
+            continue
+        if not saved.exists():
+            failures.append(f"{page.stem}: no saved result; run with --update")
+            continue
+        diff = differences(json.loads(saved.read_text(encoding="utf-8")), actual, page.stem)
+        if diff:
+            print("\n".join(diff))
+            failures.append(f"{page.stem}: output differs from {saved.name}")
+        else:
+            print(f"ok {page.stem}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+End-to-end throughput benchmark against the local stub server.
+
+Runs fetch_feed -> parse_feed -> rank_batch -> extract_readable -> make_draft
+-> save_draft through an aggregator's process() at several scales. It reports
+per-stage throughput, latency percentiles and peak RSS as JSON, so results
+can be compared between commits:
+
+    python benchmarks/run_benchmarks.py --scales 10 100 1000 --output before.json
+
+Each scale runs in a fresh interpreter with its own temporary state.db,
+cache and drafts directory, so peak RSS and caches do not leak between
+scales. The stub server runs in a separate process so serving pages does
+not compete with the pipeline for the GIL.
+"""
+
+import argparse
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import stub_server  # noqa: E402
+
+ENTRIES_PER_FEED = 50
+STAGES = ("fetch_feed", "parse_feed", "rank_batch", "extract_readable", "make_draft", "save_draft")
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class StageTimer:
+    """Wrap aggregator methods and record (start, end, items) per call."""
+
+    def __init__(self):
+        self.calls = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def wrap(self, stage: str, fn, count=None):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            items = count(result) if count else 1
+            with self.lock:
+                self.calls[stage].append((started, time.perf_counter(), items))
+            return result
+        return timed
+
+    def report(self) -> dict:
+        stages = {}
+        for stage in STAGES:
+            calls = self.calls.get(stage)
+            if not calls:
+                continue
+            latencies = sorted(end - start for start, end, _ in calls)
+            items = sum(n for _, _, n in calls)
+            # Wall-clock span covers stages that run on several threads at once
+            span = max(end for _, end, _ in calls) - min(start for start, _, _ in calls)
+            stages[stage] = {
+                "calls": len(calls),
+                "items": items,
+                "busy_s": round(sum(latencies), 4),
+                "span_s": round(span, 4),
+                "throughput_per_s": round(items / span, 2) if span > 0 else None,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+                "p90_ms": round(percentile(latencies, 0.90) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+                "max_ms": round(latencies[-1] * 1000, 3),
+            }
+        return stages
+
+
+def bench_config(module, base_url: str, entries: int, workdir: Path) -> dict:
+    """Start from the module's defaults and point it at the stub server."""
+    config = module.ContentAggregator.load_config(None)
+    feeds = max(1, math.ceil(entries / ENTRIES_PER_FEED))
+    config["NICHE"] = f"benchmark ({entries} entries)"
+    config["SOURCES"] = [
+        f"{base_url}/feed/{feed}.xml?entries={min(ENTRIES_PER_FEED, entries - feed * ENTRIES_PER_FEED)}"
+        f"&format={'atom' if feed % 2 else 'rss'}"
+        for feed in range(feeds)
+    ]
+    config["KEYWORDS"] = {
+        "must_have": stub_server.TOPICS,
+        "nice_to_have": stub_server.EXTRAS,
+        "avoid": ["Celebrity gossip"],
+    }
+
+    # Every entry goes through extraction; politeness delays would only measure sleep()
+    settings = {"HOST_MIN_INTERVAL": 0, "HOST_JITTER": 0, "THROTTLE_DELAY": 0, "RETRY_ATTEMPTS": 1}
+    output = {
+        "TOP_K": entries,
+        "OUT_DIR": str(workdir / "drafts"),
+        "DB_PATH": str(workdir / "state.db"),
+        "CACHE_DIR": str(workdir / "cache"),
+        "IMAGES_DIR": str(workdir / "images"),
+    }
+    if "REQUEST_SETTINGS" in config:
+        config["REQUEST_SETTINGS"].update(settings)
+        config["OUTPUT"].update(output)
+    else:
+        config.update(settings)
+        config.update(output)
+    return config
+
+
+def run_scale(module_name: str, base_url: str, entries: int) -> dict:
+    """Run one scale in this process and return its measurements."""
+    module = importlib.import_module(module_name)
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        workdir = Path(tmp)
+        config_path = workdir / "config.yaml"
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(bench_config(module, base_url, entries, workdir), f)
+
+        started = time.perf_counter()
+        aggregator = module.ContentAggregator(str(config_path))
+        timer = StageTimer()
+        aggregator.fetch_feed = timer.wrap("fetch_feed", aggregator.fetch_feed)
+        aggregator.parse_feed = timer.wrap("parse_feed", aggregator.parse_feed, count=len)
+        aggregator.rank_batch = timer.wrap("rank_batch", aggregator.rank_batch, count=len)
+        aggregator.extract_readable = timer.wrap("extract_readable", aggregator.extract_readable)
+        aggregator.make_draft = timer.wrap("make_draft", aggregator.make_draft)
+        aggregator.save_draft = timer.wrap("save_draft", aggregator.save_draft)
+
+        # process() prints per-article progress; keep the JSON on stdout clean
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            aggregator.process()
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        wall = time.perf_counter() - started
+        drafts = len(list((workdir / "drafts").glob("*.md")))
+
+    return {
+        "entries": entries,
+        "feeds": len(aggregator.config["SOURCES"]),
+        "drafts_written": drafts,
+        "wall_s": round(wall, 3),
+        "entries_per_s": round(entries / wall, 2),
+        "stages": timer.report(),
+        # ru_maxrss is in KiB on Linux; extraction workers show up as children
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_rss_children_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def serve(port_queue):
+    server = stub_server.start()
+    port_queue.put(server.server_address[1])
+    threading.Event().wait()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="medium_aggregator", choices=["medium_aggregator", "medium"],
+                        help="which aggregator's pipeline to run")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="numbers of feed entries to run through the pipeline")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scale(args.module, args.base_url, args.scales[0])))
+        return
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+
+    results = []
+    try:
+        for entries in args.scales:
+            print(f"Running {entries} entries...", file=sys.stderr)
+            proc = subprocess.run(
+                [sys.executable, __file__, "--worker", "--module", args.module,
+                 "--base-url", base_url, "--scales", str(entries)],
+                capture_output=True, text=True, cwd=ROOT,
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                raise SystemExit(f"Benchmark failed at {entries} entries")
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "module": args.module,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
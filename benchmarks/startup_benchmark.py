@@ -0,0 +1,204 @@
+"""
+Cold-start benchmark for the aggregator entry points.
+
+Every sample is a fresh interpreter, as a cron job would start it:
+
+    import       import <module> and nothing else
+    check        <module>.py --check against the local stub server
+
+The report gives median and worst wall-clock times per entry point, plus
+the bare interpreter start-up for reference, and lists any heavy
+dependency (HEAVY) that got imported. Those are meant to load only when a
+run reaches the stage that needs them.
+
+The run fails (exit status 1) when a heavy dependency leaks into an import
+or a --check run, when a median costs more than its budget on top of the
+bare interpreter (--import-budget and --check-budget, in ms), or, given a
+previous report as --baseline, when a median is more than --tolerance
+slower than before:
+
+    python benchmarks/startup_benchmark.py --output startup.json
+    python benchmarks/startup_benchmark.py --baseline startup.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import stub_server  # noqa: E402
+from run_benchmarks import bench_config, git_commit  # noqa: E402
+
+MODULES = ("medium_aggregator", "medium", "professional_aggregator")
+# The GUI has no --check; it always starts Tk
+CHECK_MODULES = ("medium_aggregator", "medium")
+HEAVY = ("lxml", "readability", "numpy", "frontmatter", "dateutil", "feedparser")
+# A --check run parses feeds, so feedparser is expected there
+CHECK_ALLOWED = ("feedparser",)
+CHECK_ENTRIES = 100
+# Default budgets in ms above the bare interpreter's median, about 1.5x what
+# imports and --check runs against the stub server take on a single core
+IMPORT_BUDGET_MS = 400
+CHECK_BUDGET_MS = 600
+
+# Runs in the child: time the workload, then report what it imported on stderr
+PROBE = """
+import atexit, json, runpy, sys, time
+started = time.perf_counter()
+heavy = {heavy!r}
+
+def report():
+    loaded = sorted(name for name in heavy if name in sys.modules)
+    print(json.dumps({{"seconds": time.perf_counter() - started, "heavy": loaded}}), file=sys.stderr)
+
+atexit.register(report)
+{workload}
+"""
+
+
+def run_probe(workload: str, cwd: Path) -> dict:
+    """Run workload in a fresh interpreter; return its wall time and imports."""
+    code = PROBE.format(heavy=HEAVY, workload=workload)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    lines = proc.stderr.strip().splitlines()
+    try:
+        probe = json.loads(lines[-1])
+    except (IndexError, ValueError):
+        raise SystemExit(f"Probe failed ({proc.returncode}):\n{proc.stderr}")
+    return {"wall_s": wall, "inner_s": probe["seconds"], "heavy": probe["heavy"], "returncode": proc.returncode}
+
+
+def summarize(samples: list) -> dict:
+    """Median and worst wall time of the samples and every heavy module any of them loaded."""
+    walls = sorted(sample["wall_s"] for sample in samples)
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(walls) * 1000, 1),
+        "max_ms": round(walls[-1] * 1000, 1),
+        "inner_median_ms": round(statistics.median(sample["inner_s"] for sample in samples) * 1000, 1),
+        "heavy_imports": sorted({name for sample in samples for name in sample["heavy"]}),
+    }
+
+
+def check_workdir(module_name: str, base_url: str, tmp: Path) -> Path:
+    """Working directory with a config.yaml pointing the module at the stub server."""
+    module = importlib.import_module(module_name)
+    workdir = tmp / module_name
+    workdir.mkdir()
+    with open(workdir / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(bench_config(module, base_url, CHECK_ENTRIES, workdir), f)
+    return workdir
+
+
+def measure(repeat: int) -> dict:
+    """Sample the interpreter, every module import and every --check run repeat times."""
+    results = {"interpreter": summarize([run_probe("pass", ROOT) for _ in range(repeat)])}
+    for name in MODULES:
+        workload = f"sys.path.insert(0, {str(ROOT)!r})\nimport {name}"
+        results[f"import:{name}"] = summarize([run_probe(workload, ROOT) for _ in range(repeat)])
+
+    server = stub_server.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with tempfile.TemporaryDirectory(prefix="startup-") as tmp:
+            for name in CHECK_MODULES:
+                workdir = check_workdir(name, base_url, Path(tmp))
+                script = str(ROOT / f"{name}.py")
+                workload = (
+                    f"sys.argv = [{script!r}, '--check', '--config', 'config.yaml']\n"
+                    f"sys.path.insert(0, {str(ROOT)!r})\n"
+                    f"runpy.run_path({script!r}, run_name='__main__')"
+                )
+                samples = [run_probe(workload, workdir) for _ in range(repeat)]
+                failed = [sample["returncode"] for sample in samples if sample["returncode"] not in (0, 1)]
+                if failed:
+                    raise SystemExit(f"{name}.py --check exited with {failed[0]}")
+                results[f"check:{name}"] = summarize(samples)
+    finally:
+        server.shutdown()
+    return results
+
+
+def regressions(results: dict, baseline: dict, tolerance: float, budgets: dict) -> list:
+    """Describe every leaked heavy import, every median over its budget and every one slower than the baseline allows.
+
+    budgets maps "import" and "check" to the ms allowed above the interpreter's median.
+    """
+    failures = []
+    interpreter = results["interpreter"]["median_ms"]
+    for name, result in results.items():
+        kind = name.split(":", 1)[0]
+        allowed = CHECK_ALLOWED if kind == "check" else ()
+        leaked = [module for module in result["heavy_imports"] if module not in allowed]
+        if leaked:
+            failures.append(f"{name} imported {', '.join(leaked)}")
+        budget = budgets.get(kind)
+        if budget is not None and result["median_ms"] - interpreter > budget:
+            failures.append(
+                f"{name} median {result['median_ms']}ms is over {budget}ms above interpreter start-up ({interpreter}ms)"
+            )
+        before = baseline.get(name)
+        if before and result["median_ms"] > before["median_ms"] * (1 + tolerance):
+            failures.append(
+                f"{name} median {result['median_ms']}ms is over {tolerance:.0%} slower than {before['median_ms']}ms"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--baseline", help="earlier report to compare medians against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS,
+                        help="allowed ms above interpreter start-up for importing a module")
+    parser.add_argument("--check-budget", type=float, default=CHECK_BUDGET_MS,
+                        help="allowed ms above interpreter start-up for a --check run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results = measure(max(1, args.repeat))
+    baseline = {}
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"]
+    budgets = {"import": args.import_budget, "check": args.check_budget}
+    failures = regressions(results, baseline, args.tolerance, budgets)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+        "failures": failures,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Local HTTP server with synthetic feeds, articles and images for benchmarks.
+
+Everything is generated deterministically from the request path, so runs
+are repeatable and nothing touches the network:
+
+    /feed/<feed>.xml?entries=N&format=rss|atom   feed with N entries
+    /article/<feed>/<entry>?size=BYTES           article page of about BYTES
+    /image/<name>-<width>.png                    image of a size tied to width
+"""
+
+import random
+import sys
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+TOPICS = ["AI", "Cybersecurity", "Data Breach", "Machine Learning", "Tech Startup"]
+EXTRAS = ["Kenya", "Africa", "Investment", "Open-Source", "Cloud"]
+WORDS = (
+    "model attack network vendor patch cloud startup research privacy ransomware "
+    "malware training dataset regulator policy security update breach analyst "
+    "infrastructure open source release benchmark inference agent exploit"
+).split()
+# Article sizes cycle through small, typical, long and oversized pages
+ARTICLE_SIZES = (6_000, 20_000, 60_000, 250_000)
+
+
+def sentence(rng: random.Random, words: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def entry_title(feed: int, entry: int) -> str:
+    rng = random.Random(f"title-{feed}-{entry}")
+    return f"{rng.choice(TOPICS)} {rng.choice(EXTRAS)}: {sentence(rng, 6)[:-1]} #{feed}-{entry}"
+
+
+def feed_body(base: str, feed: int, entries: int, fmt: str) -> bytes:
+    """Render an RSS 2.0 or Atom feed whose entries link to stub articles."""
+    now = datetime.now(timezone.utc)
+    items = []
+    for entry in range(entries):
+        rng = random.Random(f"summary-{feed}-{entry}")
+        link = f"{base}/article/{feed}/{entry}?size={ARTICLE_SIZES[entry % len(ARTICLE_SIZES)]}"
+        title = escape(entry_title(feed, entry))
+        summary = escape(" ".join(sentence(rng) for _ in range(3)))
+        published = now - timedelta(minutes=15 * entry + feed)
+        if fmt == "atom":
+            items.append(
+                f"<entry><title>{title}</title><link href=\"{escape(link)}\"/><id>{escape(link)}</id>"
+                f"<updated>{published.isoformat()}</updated><summary>{summary}</summary></entry>"
+            )
+        else:
+            items.append(
+                f"<item><title>{title}</title><link>{escape(link)}</link><guid>{escape(link)}</guid>"
+                f"<pubDate>{format_datetime(published)}</pubDate><description>{summary}</description></item>"
+            )
+
+    if fmt == "atom":
+        return (
+            '<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>Stub feed {feed}</title><updated>{now.isoformat()}</updated>" + "".join(items) + "</feed>"
+        ).encode()
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+        f"<title>Stub feed {feed}</title><link>{base}</link>" + "".join(items) + "</channel></rss>"
+    ).encode()
+
+
+def article_body(base: str, feed: int, entry: int, size: int) -> bytes:
+    """Render a news-like article page of roughly size bytes."""
+    rng = random.Random(f"article-{feed}-{entry}")
+    head = (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{escape(entry_title(feed, entry))}</title>"
+        "<script>window.analytics = {};</script><style>body { font-family: serif; }</style></head><body>"
+        "<nav>" + "".join(f"<a href=\"/section/{i}\">Section {i}</a>" for i in range(20)) + "</nav>"
+        f"<article><h1>{escape(entry_title(feed, entry))}</h1>"
+        f"<picture><source type=\"image/webp\" srcset=\"{base}/image/{feed}-{entry}-400.png 400w, "
+        f"{base}/image/{feed}-{entry}-1200.png 1200w\">"
+        f"<img src=\"{base}/image/{feed}-{entry}-1200.png\" alt=\"Illustration for story {feed}-{entry}\"></picture>"
+    )
+    tail = "</article><aside>Related stories</aside><footer>Stub News</footer></body></html>"
+    paragraphs = []
+    length = len(head) + len(tail)
+    while length < size:
+        paragraph = "<p>" + " ".join(sentence(rng) for _ in range(5)) + "</p>"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+    return (head + "".join(paragraphs) + tail).encode()
+
+
+def image_body(name: str) -> bytes:
+    """A PNG-signature payload whose size grows with the requested width."""
+    try:
+        width = int(name.rsplit("-", 1)[1].split(".")[0])
+    except (IndexError, ValueError):
+        width = 800
+    seed = zlib.crc32(name.encode()).to_bytes(4, "little")
+    return b"\x89PNG\r\n\x1a\n" + seed * (width * 8)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        segments = parts.path.strip("/").split("/")
+        base = f"http://{self.headers.get('Host')}"
+        try:
+            if segments[0] == "feed":
+                feed = int(segments[1].split(".")[0])
+                entries = int(query.get("entries", ["20"])[0])
+                fmt = query.get("format", ["rss"])[0]
+                body = feed_body(base, feed, entries, fmt)
+                content_type = "application/atom+xml" if fmt == "atom" else "application/rss+xml"
+            elif segments[0] == "article":
+                size = int(query.get("size", ["20000"])[0])
+                body = article_body(base, int(segments[1]), int(segments[2]), size)
+                content_type = "text/html; charset=utf-8"
+            elif segments[0] == "image":
+                body = image_body(segments[1])
+                content_type = "image/png"
+            else:
+                raise ValueError(parts.path)
+        except (IndexError, ValueError):
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections at exit is expected noise
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start(host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the stub server on a background thread and return it."""
+    server = StubServer((host, port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve synthetic feeds for benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = start(port=args.port)
+    print(f"Serving on http://127.0.0.1:{server.server_address[1]}/feed/0.xml?entries=20")
+    threading.Event().wait()
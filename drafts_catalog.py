@@ -0,0 +1,149 @@
+"""
+Catalogue of saved drafts in state.db.
+
+save_draft registers every draft in the drafts table (URL, title, source,
+score, path, created_at, published) and in an FTS5 index over its title and
+body. Listing and searching drafts is then a single indexed query, a page at
+a time, instead of globbing and stat()ing the output directory. Drafts
+written before the catalogue existed are picked up by import_dir.
+
+SQLite builds without FTS5 still get the catalogue; search then falls back
+to matching titles with LIKE.
+"""
+
+import hashlib
+import re
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+from seen_index import SeenIndex
+
+COLUMNS = ("id", "url", "title", "source", "score", "created_at", "file_path", "published")
+# Markdown link to the original article at the bottom of every draft
+SOURCE_LINK = re.compile(r"\*Source: \[[^\]]*\]\(([^)\s]+)\)")
+FRONTMATTER = re.compile(r"\A---\n.*?\n---\n", re.S)
+
+
+def match_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word, as a prefix, must match."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+class DraftCatalog:
+    """Drafts table plus full-text index, queried a page at a time."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """Create or upgrade the drafts table and its search index."""
+        self.conn = conn
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS drafts (
+                id TEXT PRIMARY KEY,
+                url TEXT,
+                title TEXT,
+                created_at TEXT,
+                file_path TEXT,
+                published BOOLEAN DEFAULT 0
+            )
+        """)
+        # The table predates the catalogue; add the columns it lacked
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(drafts)")}
+        for column, kind in (("source", "TEXT"), ("score", "REAL")):
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE drafts ADD COLUMN {column} {kind}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_drafts_created_at ON drafts(created_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_drafts_file_path ON drafts(file_path)")
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS drafts_fts USING fts5(title, body, tokenize='porter unicode61')"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5
+            self.fts = False
+        self.conn.commit()
+
+    def add(self, file_path: str, title: str, body: str = "", url: str = "", source: str = "",
+            score: float = None, created_at: str = None) -> str:
+        """Register (or update) a saved draft and index its text; returns its id.
+
+        Drafts are keyed by article URL, so regenerating one keeps its
+        published flag.
+        """
+        draft_id = SeenIndex.url_id(url) if url else hashlib.sha256(str(file_path).encode()).hexdigest()
+        created_at = created_at or datetime.now(timezone.utc).isoformat()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO drafts(id, url, title, source, score, created_at, file_path) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET url=excluded.url, title=excluded.title, source=excluded.source, "
+                "score=COALESCE(excluded.score, drafts.score), created_at=excluded.created_at, file_path=excluded.file_path",
+                (draft_id, url, title, source, score, created_at, str(file_path))
+            )
+            if self.fts:
+                rowid = self.conn.execute("SELECT rowid FROM drafts WHERE id=?", (draft_id,)).fetchone()[0]
+                self.conn.execute("DELETE FROM drafts_fts WHERE rowid=?", (rowid,))
+                self.conn.execute(
+                    "INSERT INTO drafts_fts(rowid, title, body) VALUES(?, ?, ?)",
+                    (rowid, title, FRONTMATTER.sub("", body, count=1))
+                )
+        return draft_id
+
+    def where(self, query: str) -> tuple:
+        """FROM/WHERE clause and parameters for an optional search query."""
+        match = match_query(query or "")
+        if not match:
+            return "FROM drafts", ()
+        if self.fts:
+            return "FROM drafts JOIN drafts_fts ON drafts_fts.rowid = drafts.rowid WHERE drafts_fts MATCH ?", (match,)
+        return "FROM drafts WHERE title LIKE ?", (f"%{query.strip()}%",)
+
+    def count(self, query: str = None) -> int:
+        """Number of drafts matching query (all drafts without one)."""
+        clause, params = self.where(query)
+        return self.conn.execute(f"SELECT COUNT(*) {clause}", params).fetchone()[0]
+
+    def page(self, query: str = None, offset: int = 0, limit: int = 100) -> list:
+        """One page of drafts as dicts: best matches first, or newest first without a query."""
+        clause, params = self.where(query)
+        order = "drafts_fts.rank" if self.fts and match_query(query or "") else "drafts.created_at DESC"
+        columns = ", ".join(f"drafts.{column}" for column in COLUMNS)
+        rows = self.conn.execute(
+            f"SELECT {columns} {clause} ORDER BY {order} LIMIT ? OFFSET ?", (*params, limit, offset)
+        )
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def import_dir(self, out_dir: str) -> int:
+        """Register .md drafts in out_dir that are not catalogued yet; returns how many."""
+        import frontmatter
+
+        known = {row[0] for row in self.conn.execute("SELECT file_path FROM drafts")}
+        added = 0
+        for path in Path(out_dir).glob("*.md"):
+            if str(path) in known:
+                continue
+            try:
+                post = frontmatter.load(path)
+            except Exception:
+                continue
+            link = SOURCE_LINK.search(post.content)
+            created_at = post.metadata.get("date") or datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+            self.add(
+                path,
+                post.metadata.get("title") or path.stem,
+                post.content,
+                url=link.group(1) if link else "",
+                source=post.metadata.get("source", ""),
+                created_at=str(created_at.isoformat() if isinstance(created_at, datetime) else created_at),
+            )
+            added += 1
+        return added
+
+    def prune_missing(self) -> int:
+        """Forget drafts whose file has been deleted; returns how many."""
+        gone = [(rowid,) for rowid, file_path in self.conn.execute("SELECT rowid, file_path FROM drafts")
+                if not Path(file_path).exists()]
+        with self.conn:
+            if self.fts:
+                self.conn.executemany("DELETE FROM drafts_fts WHERE rowid=?", gone)
+            self.conn.executemany("DELETE FROM drafts WHERE rowid=?", gone)
+        return len(gone)
@@ -0,0 +1,639 @@
+"""
+Article extraction stage for the content aggregators.
+
+readability and the Markdown conversion are CPU-bound, so extraction runs in
+a process pool: the downloader hands over raw HTML bytes and gets back the
+usual title/text/markdown/images dict without holding the GIL in the caller.
+
+The bytes are never decoded in Python. The charset is sniffed from the BOM,
+the Content-Type header or a <meta> tag in the first KB, and lxml parses the
+raw bytes with it; readability then works on that tree instead of re-encoding
+a string or running charset detection over the whole page.
+
+Everything after readability works on the article tree it leaves behind:
+unwanted tags go in one strip_elements pass, and a single traversal by
+ArticleRenderer produces the text, the Markdown and the image list. The
+article is never serialized and parsed again.
+
+lxml and readability are imported by the first extraction, so importing
+this module (for header_charset, or to set up the pool) stays cheap for runs
+that never extract an article.
+"""
+
+import codecs
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from urllib.parse import urljoin
+
+STRIP_TAGS = ["script", "style", "nav", "footer", "form", "iframe", "aside"]
+
+# HTML5 limits the <meta charset> prescan to the first 1024 bytes
+SNIFF_BYTES = 1024
+HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+
+
+def header_charset(content_type: str) -> str:
+    """Return the charset declared in a Content-Type header, if any."""
+    match = HEADER_CHARSET.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def known_charset(name) -> str:
+    """Normalise a charset label, or return None if Python does not know it."""
+    if isinstance(name, bytes):
+        name = name.decode("ascii", "ignore")
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+
+def sniff_charset(content: bytes, declared: str = None) -> str:
+    """Pick the charset for an HTML body: BOM, then header, then <meta>, then UTF-8."""
+    for bom, charset in BOMS:
+        if content.startswith(bom):
+            return charset
+    match = META_CHARSET.search(content[:SNIFF_BYTES])
+    return known_charset(declared) or known_charset(match and match.group(1)) or "utf-8"
+
+
+def parse_html(content: bytes, charset: str):
+    """Parse raw bytes into an lxml tree without decoding them in Python."""
+    import lxml.html
+
+    parser = lxml.html.HTMLParser(encoding=charset)
+    return lxml.html.document_fromstring(content, parser=parser)
+
+
+# Tracking pixels, beacons and spacer images that are never worth downloading. Only
+# a whole file name matches (spacer.gif, /pixel?id=1), not words inside one, as in
+# google-pixel-9-review.jpg
+TRACKER = re.compile(
+    r"(?:^|/)(?:pixel|beacon|spacer|blank|1x1|track|tracking|tracker)(?:\.\w+)?(?:[?#;]|$)", re.I
+)
+SRC_ATTRS = ("src", "data-src", "data-lazy-src", "data-original")
+SRCSET_ATTRS = ("srcset", "data-srcset")
+
+
+def parse_srcset(srcset: str) -> list:
+    """Parse a srcset attribute into (url, width, density) tuples.
+
+    Follows the HTML tokenizing rules closely enough for CDN URLs that
+    contain commas, such as .../w_300,h_200/photo.jpg.
+    """
+    candidates = []
+    pos, length = 0, len(srcset or "")
+    while pos < length:
+        while pos < length and (srcset[pos].isspace() or srcset[pos] == ","):
+            pos += 1
+        start = pos
+        while pos < length and not srcset[pos].isspace():
+            pos += 1
+        url = srcset[start:pos]
+        descriptor = ""
+        if url.endswith(","):
+            url = url.rstrip(",")
+        else:
+            start = pos
+            while pos < length and srcset[pos] != ",":
+                pos += 1
+            descriptor = srcset[start:pos].strip().lower()
+        if not url:
+            continue
+
+        width, density = None, None
+        try:
+            if descriptor.endswith("w"):
+                width = int(descriptor[:-1])
+            elif descriptor.endswith("x"):
+                density = float(descriptor[:-1])
+        except ValueError:
+            continue
+        candidates.append((url, width, density))
+    return candidates
+
+
+def pick_rendition(candidates: list, target_width: int) -> str:
+    """Choose the smallest rendition at least target_width wide.
+
+    Falls back to the widest one below the target, then to the 1x (or
+    lowest-density) candidate when no widths are given.
+    """
+    widths = sorted((width, url) for url, width, _ in candidates if width)
+    if widths:
+        for width, url in widths:
+            if width >= target_width:
+                return url
+        return widths[-1][1]
+    densities = sorted((density or 1.0, url) for url, _, density in candidates)
+    for density, url in densities:
+        if density >= 1.0:
+            return url
+    return densities[-1][1] if densities else None
+
+
+def image_candidates(img) -> list:
+    """Collect srcset, <picture><source> and plain src candidates for an <img> element."""
+    candidates = []
+    picture = next(img.iterancestors("picture"), None)
+    if picture is not None:
+        for source in picture.iter("source"):
+            for attr in SRCSET_ATTRS:
+                candidates.extend(parse_srcset(source.get(attr, "")))
+    for attr in SRCSET_ATTRS:
+        candidates.extend(parse_srcset(img.get(attr, "")))
+    for attr in SRC_ATTRS:
+        if img.get(attr):
+            candidates.append((img.get(attr).strip(), None, None))
+    return [
+        candidate for candidate in candidates
+        if not candidate[0].startswith("data:") and not TRACKER.search(candidate[0])
+    ]
+
+
+def select_image(img, base_url: str, target_width: int = 800) -> dict:
+    """Return {"url", "alt"} for a captioned <img> element, or None if it is not worth keeping.
+
+    For responsive images the smallest rendition at least target_width
+    pixels wide is used instead of whatever src happens to point at.
+    """
+    alt = img.get('alt', '').strip()
+    if not alt or len(alt) < 5:
+        return None
+
+    candidates = image_candidates(img)
+    if not candidates:
+        return None
+    # Plain src candidates carry no size, so only fall back to them
+    sized = [c for c in candidates if c[1] or c[2]]
+    src = pick_rendition(sized, target_width) if sized else candidates[0][0]
+
+    try:
+        if src.startswith('//'):
+            src = 'https:' + src
+        elif not src.startswith(('http://', 'https://')):
+            src = urljoin(base_url, src)
+    except ValueError:
+        return None
+    return {'url': src, 'alt': alt}
+
+
+# Markdown conventions below are markdownify's defaults, so drafts keep their look
+BLOCK_TAGS = {
+    "p", "blockquote", "article", "div", "section", "ol", "ul", "li",
+    "dl", "dt", "dd", "table", "thead", "tbody", "tfoot", "tr", "td", "th",
+}
+HEADING = re.compile(r"h(\d+)")
+LINE_WITH_CONTENT = re.compile(r"^(.*)", re.M)
+WHITESPACE = re.compile(r"[\t ]+")
+ALL_WHITESPACE = re.compile(r"[\t \r\n]+")
+NEWLINE_WHITESPACE = re.compile(r"[\t \r\n]*[\r\n][\t \r\n]*")
+PRE_LSTRIP = re.compile(r"^[ \n]*\n")
+PRE_RSTRIP = re.compile(r"[ \n]*$")
+EDGE_NEWLINES = re.compile(r"^(\n*)((?:.*[^\n])?)(\n*)$", re.S)
+BACKTICK_RUNS = re.compile(r"`+")
+INLINE_MARKUP = {"b": "**", "strong": "**", "em": "*", "i": "*", "del": "~~", "s": "~~", "sub": "", "sup": ""}
+BULLETS = "*+-"
+
+
+def tag_of(node) -> str:
+    """Tag name of an element; None for text, comments and processing instructions."""
+    tag = getattr(node, "tag", None)
+    return tag if isinstance(tag, str) else None
+
+
+def is_block(node) -> bool:
+    """Whether whitespace just inside node is insignificant."""
+    tag = tag_of(node)
+    return bool(tag) and (tag in BLOCK_TAGS or HEADING.match(tag) is not None)
+
+
+def is_block_outside(node) -> bool:
+    """Whether whitespace just around node is insignificant."""
+    return is_block(node) or tag_of(node) == "pre"
+
+
+def previous_element(el):
+    """Previous sibling element, skipping comments."""
+    el = el.getprevious()
+    while el is not None and tag_of(el) is None:
+        el = el.getprevious()
+    return el
+
+
+def next_content(el):
+    """Next sibling with content: non-blank text, or an element other than a comment."""
+    while True:
+        if el.tail and el.tail.strip():
+            return el.tail
+        el = el.getnext()
+        if el is None or tag_of(el) is not None:
+            return el
+
+
+def chomp(text: str) -> tuple:
+    """Move a leading/trailing space out of inline markup: <b> foo</b> gives " **foo**"."""
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+
+class ArticleRenderer:
+    """Turn a cleaned article tree into text, Markdown and images in one traversal.
+
+    The plain text matches BeautifulSoup's get_text("\\n", strip=True) and the
+    Markdown follows markdownify's default output, which is what extraction
+    produced before it moved to a single lxml tree.
+    """
+
+    def __init__(self, base_url: str, max_images: int = 0, target_width: int = 800):
+        """Initialize with the article URL (for image links) and the image limits."""
+        self.base_url = base_url
+        self.max_images = max_images
+        self.target_width = target_width
+        self.texts = []
+        self.images = []
+
+    def render(self, root) -> str:
+        """Walk root once; return its Markdown and leave the text pieces and images on self."""
+        return self.element(root, frozenset()).strip("\n")
+
+    @property
+    def text(self) -> str:
+        """Text pieces seen by render(), one per line."""
+        return "\n".join(self.texts)
+
+    def element(self, node, parent_tags: frozenset) -> str:
+        tag = tag_of(node)
+        if tag == "img" and len(self.images) < self.max_images:
+            image = select_image(node, self.base_url, self.target_width)
+            if image:
+                self.images.append(image)
+
+        children = [node.text] if node.text else []
+        for child in node:
+            children.append(child)
+            if child.tail:
+                children.append(child.tail)
+
+        inner_tags = {tag}
+        if HEADING.match(tag) or tag in ("td", "th"):
+            inner_tags.add("_inline")
+        if tag in ("pre", "code", "kbd", "samp"):
+            inner_tags.add("_noformat")
+        inner_tags = parent_tags | inner_tags
+
+        strip_inside = is_block(node)
+        last = len(children) - 1
+        strings = []
+        for i, child in enumerate(children):
+            previous = children[i - 1] if i > 0 else None
+            following = children[i + 1] if i < last else None
+            if isinstance(child, str):
+                if not child.strip():
+                    # Whitespace at the edges of blocks, or between them, is dropped
+                    if strip_inside and (previous is None or following is None):
+                        continue
+                    if is_block_outside(previous) or is_block_outside(following):
+                        continue
+                strings.append(self.string(child, previous, following, strip_inside, inner_tags))
+            elif tag_of(child) is not None:
+                strings.append(self.element(child, inner_tags))
+        strings = [string for string in strings if string]
+
+        if "pre" not in inner_tags:
+            # Between two blocks keep the larger separation, at most a blank line
+            collapsed = [""]
+            for string in strings:
+                leading, content, trailing = EDGE_NEWLINES.match(string).groups()
+                if collapsed[-1] and leading:
+                    leading = "\n" * min(2, max(len(collapsed.pop()), len(leading)))
+                collapsed.extend([leading, content, trailing])
+            strings = collapsed
+        text = "".join(strings)
+
+        convert = getattr(self, f"convert_{tag}", None)
+        if convert is not None:
+            return convert(node, text, parent_tags)
+        if tag in INLINE_MARKUP:
+            return self.inline(INLINE_MARKUP[tag], text, parent_tags)
+        match = HEADING.match(tag)
+        if match:
+            return self.heading(int(match.group(1)), text, parent_tags)
+        return text
+
+    def string(self, raw: str, previous, following, strip_inside: bool, parent_tags: frozenset) -> str:
+        if raw.strip():
+            self.texts.append(raw.strip())
+        text = raw
+        if "pre" not in parent_tags:
+            text = WHITESPACE.sub(" ", NEWLINE_WHITESPACE.sub("\n", text))
+        if "_noformat" not in parent_tags:
+            text = text.replace("*", r"\*").replace("_", r"\_")
+        if is_block_outside(previous) or (strip_inside and previous is None):
+            text = text.lstrip(" \t\r\n")
+        if is_block_outside(following) or (strip_inside and following is None):
+            text = text.rstrip()
+        return text
+
+    @staticmethod
+    def inline(markup: str, text: str, parent_tags: frozenset) -> str:
+        if "_noformat" in parent_tags:
+            return text
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        return f"{prefix}{markup}{text}{markup}{suffix}"
+
+    @staticmethod
+    def heading(level: int, text: str, parent_tags: frozenset) -> str:
+        if "_inline" in parent_tags:
+            return text
+        level = max(1, min(6, level))
+        text = text.strip()
+        if level <= 2:
+            return f"\n\n{text}\n{('=' if level == 1 else '-') * len(text)}\n\n" if text else ""
+        text = ALL_WHITESPACE.sub(" ", text)
+        return f"\n\n{'#' * level} {text}\n\n"
+
+    def convert_a(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return text
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        href = el.get("href")
+        title = el.get("title")
+        if text.replace(r"\_", "_") == href and not title:
+            return f"<{href}>"
+        title_part = ' "%s"' % title.replace('"', r'\"') if title else ""
+        return f"{prefix}[{text}]({href}{title_part}){suffix}" if href else text
+
+    def convert_blockquote(self, el, text, parent_tags):
+        text = (text or "").strip(" \t\r\n")
+        if "_inline" in parent_tags:
+            return f" {text} "
+        if not text:
+            return "\n"
+        text = LINE_WITH_CONTENT.sub(lambda m: "> " + m.group(1) if m.group(1) else ">", text)
+        return f"\n{text}\n\n"
+
+    def convert_br(self, el, text, parent_tags):
+        if "_inline" in parent_tags:
+            return text + " " if text else " "
+        return "  \n" + text
+
+    def convert_code(self, el, text, parent_tags):
+        if "_noformat" in parent_tags:
+            return text
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        longest = max((len(run) for run in BACKTICK_RUNS.findall(text)), default=0)
+        if longest:
+            text = f" {text} "
+        delimiter = "`" * (longest + 1)
+        return f"{prefix}{delimiter}{text}{delimiter}{suffix}"
+
+    convert_kbd = convert_code
+    convert_samp = convert_code
+
+    def convert_div(self, el, text, parent_tags):
+        if "_inline" in parent_tags:
+            return f" {text.strip()} "
+        text = text.strip()
+        return f"\n\n{text}\n\n" if text else ""
+
+    convert_article = convert_div
+    convert_section = convert_div
+    convert_dl = convert_div
+
+    def convert_dd(self, el, text, parent_tags):
+        text = (text or "").strip()
+        if "_inline" in parent_tags:
+            return f" {text} "
+        if not text:
+            return "\n"
+        text = LINE_WITH_CONTENT.sub(lambda m: "    " + m.group(1) if m.group(1) else "", text)
+        return ":" + text[1:] + "\n"
+
+    def convert_dt(self, el, text, parent_tags):
+        text = ALL_WHITESPACE.sub(" ", (text or "").strip())
+        if "_inline" in parent_tags:
+            return f" {text} "
+        return f"\n\n{text}\n" if text else "\n"
+
+    def convert_hr(self, el, text, parent_tags):
+        return "\n\n---\n\n"
+
+    def convert_img(self, el, text, parent_tags):
+        alt = el.get("alt") or ""
+        if "_inline" in parent_tags:
+            return alt
+        title = el.get("title") or ""
+        title_part = ' "%s"' % title.replace('"', r'\"') if title else ""
+        return f"![{alt}]({el.get('src') or ''}{title_part})"
+
+    def convert_video(self, el, text, parent_tags):
+        if "_inline" in parent_tags:
+            return text
+        src = el.get("src") or next((source.get("src") for source in el.iter("source") if source.get("src")), "")
+        poster = el.get("poster") or ""
+        if src and poster:
+            return f"[![{text}]({poster})]({src})"
+        if src:
+            return f"[{text}]({src})"
+        if poster:
+            return f"![{text}]({poster})"
+        return text
+
+    def convert_ul(self, el, text, parent_tags):
+        if "li" in parent_tags:
+            return "\n" + text.rstrip()
+        # A list followed by anything but another list ends with a blank line
+        following = next_content(el)
+        before_paragraph = following is not None and tag_of(following) not in ("ul", "ol")
+        return "\n\n" + text + ("\n" if before_paragraph else "")
+
+    convert_ol = convert_ul
+
+    def convert_li(self, el, text, parent_tags):
+        text = (text or "").strip()
+        if not text:
+            return "\n"
+        parent = el.getparent()
+        if parent is not None and parent.tag == "ol":
+            start = parent.get("start")
+            start = int(start) if start and start.isnumeric() else 1
+            bullet = f"{start + sum(1 for sibling in el.itersiblings('li', preceding=True))}."
+        else:
+            depth = sum(1 for ancestor in el.iterancestors("ul"))
+            bullet = BULLETS[(depth - 1) % len(BULLETS)]
+        bullet += " "
+        indent = " " * len(bullet)
+        text = LINE_WITH_CONTENT.sub(lambda m: indent + m.group(1) if m.group(1) else "", text)
+        return bullet + text[len(bullet):] + "\n"
+
+    def convert_p(self, el, text, parent_tags):
+        if "_inline" in parent_tags:
+            return " " + text.strip(" \t\r\n") + " "
+        text = text.strip(" \t\r\n")
+        return f"\n\n{text}\n\n" if text else ""
+
+    def convert_pre(self, el, text, parent_tags):
+        if not text:
+            return ""
+        text = PRE_RSTRIP.sub("", PRE_LSTRIP.sub("", text))
+        return f"\n\n```\n{text}\n```\n\n"
+
+    def convert_q(self, el, text, parent_tags):
+        return f'"{text}"'
+
+    def convert_script(self, el, text, parent_tags):
+        return ""
+
+    convert_style = convert_script
+
+    def convert_table(self, el, text, parent_tags):
+        return "\n\n" + text.strip() + "\n\n"
+
+    def convert_caption(self, el, text, parent_tags):
+        return text.strip() + "\n\n"
+
+    def convert_figcaption(self, el, text, parent_tags):
+        return "\n\n" + text.strip() + "\n\n"
+
+    @staticmethod
+    def colspan(cell) -> int:
+        span = cell.get("colspan", "")
+        return max(1, min(1000, int(span))) if span.isdigit() else 1
+
+    def convert_td(self, el, text, parent_tags):
+        return " " + text.strip().replace("\n", " ") + " |" * self.colspan(el)
+
+    convert_th = convert_td
+
+    def convert_tr(self, el, text, parent_tags):
+        cells = [cell for cell in el.iterdescendants("td", "th")]
+        parent = el.getparent()
+        first_row = previous_element(el) is None
+        head_row = all(cell.tag == "th" for cell in cells) or (
+            parent.tag == "thead" and sum(1 for _ in parent.iterdescendants("tr")) == 1
+        )
+        head_row_missing = first_row and (
+            parent.tag != "tbody" or not any(True for _ in parent.getparent().iterdescendants("thead"))
+        )
+        columns = sum(self.colspan(cell) for cell in cells)
+        overline = underline = ""
+        if head_row and first_row:
+            underline = "| " + " | ".join(["---"] * columns) + " |\n"
+        elif head_row_missing or (first_row and (
+                parent.tag == "table" or (parent.tag == "tbody" and previous_element(parent) is None))):
+            overline = "| " + " | ".join([""] * columns) + " |\n"
+            overline += "| " + " | ".join(["---"] * columns) + " |\n"
+        return f"{overline}|{text}\n{underline}"
+
+
+def extract_html(content: bytes, url: str, encoding: str = None,
+                 min_length: int = 300, max_images: int = 0, target_width: int = 800) -> dict:
+    """Turn downloaded HTML bytes into the extraction result dict.
+
+    encoding is the charset from the Content-Type header, if it declared one.
+    The dict's "elapsed" is the extraction time in seconds and "timings"
+    splits it into the readability and render steps.
+    """
+    started = time.perf_counter()
+    result = _extract(content, url, encoding, min_length, max_images, target_width)
+    result["elapsed"] = time.perf_counter() - started
+    return result
+
+
+def _extract(content: bytes, url: str, encoding: str, min_length: int,
+             max_images: int, target_width: int) -> dict:
+    from lxml import etree
+    from readability import Document
+
+    started = time.perf_counter()
+    try:
+        if isinstance(content, str):
+            doc = Document(content)
+        else:
+            # readability deep-copies a pre-built tree instead of re-parsing it
+            doc = Document(parse_html(content, sniff_charset(content, encoding)))
+        title = doc.title() or ""
+        page = doc.html
+        summary = doc.summary()
+        # summary() leaves the cleaned article in doc.html, which saves parsing
+        # the HTML string it returns. That is readability's doing, not its API
+        # (checked up to the version requirements.txt allows), so should doc.html
+        # still be the whole page, the summary is parsed after all.
+        tree = doc.html
+        if tree is None or tree is page:
+            import lxml.html
+
+            tree = lxml.html.document_fromstring(summary)
+        etree.strip_elements(tree, *STRIP_TAGS, with_tail=False)
+        timings = {"readability": time.perf_counter() - started}
+
+        started = time.perf_counter()
+        renderer = ArticleRenderer(url, max_images, target_width)
+        markdown = renderer.render(tree)
+        text = re.sub(r"\n{3,}", "\n\n", renderer.text)
+        timings["render"] = time.perf_counter() - started
+
+        if len(text) < min_length:
+            return {"ok": False, "error": "Content too short", "text": text, "title": title, "timings": timings}
+
+        return {
+            "ok": True,
+            "title": title,
+            "text": text,
+            "markdown": markdown,
+            "url": url,
+            "images": renderer.images,
+            "timings": timings,
+        }
+
+    except Exception as e:
+        return {"ok": False, "error": str(e), "text": "", "title": ""}
+
+
+class ExtractionPool:
+    """Process pool that runs extract_html off the calling thread."""
+
+    def __init__(self, workers: int = None):
+        """Initialize with a worker count; None means one per CPU, 0 runs inline."""
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, int(workers))
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def submit(self, content: bytes, url: str, encoding: str = None,
+               min_length: int = 300, max_images: int = 0, target_width: int = 800) -> Future:
+        """Queue HTML bytes for extraction and return a future for the result dict."""
+        if self.workers == 0:
+            future = Future()
+            future.set_result(extract_html(content, url, encoding, min_length, max_images, target_width))
+            return future
+
+        with self.lock:
+            if self.executor is None:
+                # spawn keeps worker start-up safe while GUI and download threads are running
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self.executor.submit(
+                extract_html, content, url, encoding, min_length, max_images, target_width
+            )
+
+    def shutdown(self):
+        """Stop the worker processes; the pool restarts on the next submit."""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
@@ -0,0 +1,164 @@
+"""
+Concurrent feed downloading for the content aggregators.
+
+All sources are fetched at once with asyncio, bounded by a global and a
+per-host concurrency limit. The raw response bytes are handed back to the
+caller so feedparser never touches the network itself, and every feed gets a
+result dict with its timing and any failure instead of being silently skipped.
+
+FeedCache keeps each source's ETag, Last-Modified and body hash in state.db so
+unchanged feeds are answered with a 304 (or recognised by hash) and not parsed.
+"""
+
+import asyncio
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import requests
+
+
+class FeedCache:
+    """Conditional GET validators per feed source, stored in state.db."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """Create the feed_cache table on the given connection if needed."""
+        self.conn = conn
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_cache (
+                source TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                fetched_at TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def load(self, sources: list) -> dict:
+        """Return stored validators keyed by source."""
+        validators = {}
+        for source in sources:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, body_hash FROM feed_cache WHERE source=?", (source,)
+            ).fetchone()
+            if row:
+                validators[source] = {"etag": row[0], "last_modified": row[1], "body_hash": row[2]}
+        return validators
+
+    def store(self, result: dict):
+        """Remember the validators of a successfully parsed feed."""
+        if not result["ok"] or result.get("not_modified"):
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO feed_cache(source, etag, last_modified, body_hash, fetched_at) "
+            "VALUES(?, ?, ?, ?, ?)",
+            (
+                result["source"],
+                result["headers"].get("etag"),
+                result["headers"].get("last-modified"),
+                result["body_hash"],
+                datetime.now(timezone.utc).isoformat(),
+            )
+        )
+        self.conn.commit()
+
+
+class FeedFetcher:
+    """Download RSS/Atom feeds concurrently with per-host limits."""
+
+    def __init__(self, session: requests.Session = None, user_agents: list = None,
+                 timeout: float = 30, concurrency: int = 16, per_host: int = 2):
+        """Initialize with a shared HTTP session and concurrency limits."""
+        self.session = session or requests.Session()
+        self.user_agents = user_agents or ["Mozilla/5.0"]
+        self.timeout = timeout
+        self.concurrency = max(1, int(concurrency))
+        self.per_host = max(1, int(per_host))
+        self.host_limits = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """Extract the host used for per-host limiting."""
+        try:
+            return urlparse(url).netloc.replace("www.", "")
+        except ValueError:
+            return ""
+
+    def fetch_one(self, source: str, validators: dict = None) -> dict:
+        """Blocking conditional download of a single feed, returning a result dict."""
+        validators = validators or {}
+        headers = {
+            "User-Agent": random.choice(self.user_agents),
+            "Accept": "application/rss+xml,application/atom+xml,application/xml;q=0.9,*/*;q=0.8",
+        }
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        started = time.perf_counter()
+        try:
+            resp = self.session.get(source, headers=headers, timeout=self.timeout)
+            resp.raise_for_status()
+            content = resp.content if resp.status_code != 304 else b""
+            body_hash = hashlib.sha256(content).hexdigest() if content else validators.get("body_hash")
+            return {
+                "ok": True,
+                "source": source,
+                "status": resp.status_code,
+                "content": content,
+                "headers": {k.lower(): v for k, v in resp.headers.items()},
+                "body_hash": body_hash,
+                "not_modified": resp.status_code == 304 or body_hash == validators.get("body_hash"),
+                "elapsed": time.perf_counter() - started,
+                "error": "",
+            }
+        except requests.exceptions.RequestException as e:
+            response = getattr(e, "response", None)
+            return {
+                "ok": False,
+                "source": source,
+                "status": response.status_code if response is not None else 0,
+                "content": b"",
+                "headers": {},
+                "body_hash": None,
+                "not_modified": False,
+                "elapsed": time.perf_counter() - started,
+                "error": str(e),
+            }
+
+    def fetch_limited(self, source: str, validators: dict = None) -> dict:
+        """fetch_one for callers running their own threads, holding one of the host's per_host slots."""
+        with self.lock:
+            host_limit = self.host_limits.setdefault(self.host_of(source), threading.BoundedSemaphore(self.per_host))
+        with host_limit:
+            return self.fetch_one(source, validators)
+
+    async def fetch_all_async(self, sources: list, validators: dict = None) -> list:
+        """Download every source concurrently, preserving input order."""
+        validators = validators or {}
+        loop = asyncio.get_running_loop()
+        global_limit = asyncio.Semaphore(self.concurrency)
+        host_limits = {}
+
+        async def fetch(source):
+            host_limit = host_limits.setdefault(self.host_of(source), asyncio.Semaphore(self.per_host))
+            async with global_limit, host_limit:
+                return await loop.run_in_executor(executor, self.fetch_one, source, validators.get(source))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return await asyncio.gather(*(fetch(source) for source in sources))
+
+    def fetch_all(self, sources: list, use_async: bool = True, validators: dict = None) -> list:
+        """Download all sources, concurrently unless use_async is False."""
+        validators = validators or {}
+        if not use_async:
+            return [self.fetch_one(source, validators.get(source)) for source in sources]
+        return asyncio.run(self.fetch_all_async(sources, validators))
@@ -0,0 +1,94 @@
+"""
+Adaptive polling schedule for daemon mode.
+
+Each source keeps its own interval in state.db. After a fetch the interval
+moves towards the mean gap between the feed's recent entry timestamps, so
+busy feeds are polled often and quiet ones rarely. Unchanged or failed
+fetches back the interval off. Intervals stay within configured bounds and
+get random jitter so feeds on the same host do not line up.
+"""
+
+import random
+import sqlite3
+import time
+
+# How far one observation moves the interval (exponential moving average)
+SMOOTHING = 0.5
+# Growth factor when a poll brings nothing new
+BACKOFF = 1.5
+
+
+class FeedSchedule:
+    """Per-source poll intervals and due times persisted in state.db."""
+
+    def __init__(self, conn: sqlite3.Connection, min_interval: float = 300,
+                 max_interval: float = 6 * 3600, default_interval: float = 1800, jitter: float = 0.1):
+        """Initialize with interval bounds in seconds."""
+        self.conn = conn
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_schedule (
+                source TEXT PRIMARY KEY,
+                interval REAL,
+                next_poll REAL,
+                newest_entry REAL
+            )
+        """)
+        self.conn.commit()
+
+    def clamp(self, interval: float) -> float:
+        """Keep an interval within the configured bounds."""
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def due(self, sources: list, now: float = None) -> list:
+        """Return the sources whose next poll time has passed; new sources are due at once."""
+        now = time.time() if now is None else now
+        next_polls = dict(self.conn.execute("SELECT source, next_poll FROM feed_schedule"))
+        return [source for source in sources if next_polls.get(source, 0) <= now]
+
+    def seconds_until_next(self, sources: list, now: float = None) -> float:
+        """Seconds until the earliest scheduled poll among sources."""
+        now = time.time() if now is None else now
+        next_polls = dict(self.conn.execute("SELECT source, next_poll FROM feed_schedule"))
+        return max(0.0, min((next_polls.get(source, 0) for source in sources), default=0) - now)
+
+    @staticmethod
+    def publish_gap(entry_times: list) -> float:
+        """Mean gap in seconds between distinct entry timestamps, or None."""
+        times = sorted(set(entry_times))
+        if len(times) < 2:
+            return None
+        return (times[-1] - times[0]) / (len(times) - 1)
+
+    def observe(self, result: dict, now: float = None):
+        """Update a source's interval from a fetch result and schedule its next poll.
+
+        result is a feed fetch result; "entry_times" holds the epoch
+        timestamps of the entries that were parsed from it.
+        """
+        now = time.time() if now is None else now
+        row = self.conn.execute(
+            "SELECT interval, newest_entry FROM feed_schedule WHERE source=?", (result["source"],)
+        ).fetchone()
+        interval, newest = row if row else (self.default_interval, 0.0)
+
+        entry_times = result.get("entry_times") or []
+        gap = self.publish_gap(entry_times)
+        if result["ok"] and not result["not_modified"] and entry_times and max(entry_times) > newest:
+            newest = max(entry_times)
+            if gap:
+                interval = (1 - SMOOTHING) * interval + SMOOTHING * gap
+        else:
+            # Nothing new (or the fetch failed): check this feed less often
+            interval *= BACKOFF
+
+        interval = self.clamp(interval)
+        next_poll = now + interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO feed_schedule(source, interval, next_poll, newest_entry) VALUES(?, ?, ?, ?)",
+                (result["source"], interval, next_poll, newest)
+            )
@@ -0,0 +1,148 @@
+"""
+Content-addressed cache of raw article HTML.
+
+Downloaded bodies are compressed (zstd when the zstandard package is
+installed, gzip otherwise) and stored once per SHA-256 of the body. An index
+keyed by canonical URL points at the blob, and the least recently used
+entries are evicted once the blobs exceed the configured size. Drafts can
+then be regenerated from the cache without downloading anything again.
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from seen_index import SeenIndex
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+def compress(content: bytes) -> tuple:
+    """Return (suffix, compressed bytes) using the best available codec."""
+    if zstandard is not None:
+        return ".zst", zstandard.ZstdCompressor(level=10).compress(content)
+    return ".gz", gzip.compress(content, compresslevel=6)
+
+
+def decompress(path: Path) -> bytes:
+    """Read and decompress a blob written by compress()."""
+    data = path.read_bytes()
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read " + path.name)
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class HtmlCache:
+    """Size-bounded LRU cache of raw article bodies."""
+
+    def __init__(self, root: str = "cache", max_bytes: int = 256 * 1024 * 1024):
+        """Open (or create) the cache directory and its index."""
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+        # Article downloads run on worker threads, so the index has its own
+        # connection guarded by a lock rather than sharing state.db's
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.root / "index.db", check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id TEXT PRIMARY KEY,
+                url TEXT,
+                body_hash TEXT,
+                blob TEXT,
+                encoding TEXT,
+                size INTEGER,
+                stored_at TEXT,
+                accessed_at TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed_at ON pages(accessed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_body_hash ON pages(body_hash)")
+        self.conn.commit()
+
+    def blob_path(self, blob: str) -> Path:
+        """Fan blobs out over 256 subdirectories."""
+        return self.root / blob[:2] / blob
+
+    def get(self, url: str):
+        """Return (content, encoding) for a cached URL, or None."""
+        url_id = SeenIndex.url_id(url)
+        with self.lock:
+            row = self.conn.execute("SELECT blob, encoding FROM pages WHERE id=?", (url_id,)).fetchone()
+            if row is None:
+                return None
+            try:
+                content = decompress(self.blob_path(row[0]))
+            except (OSError, RuntimeError, EOFError):
+                self.conn.execute("DELETE FROM pages WHERE id=?", (url_id,))
+                self.conn.commit()
+                return None
+            self.conn.execute(
+                "UPDATE pages SET accessed_at=? WHERE id=?", (datetime.now(timezone.utc).isoformat(), url_id)
+            )
+            self.conn.commit()
+        return content, row[1]
+
+    def put(self, url: str, content: bytes, encoding: str = None):
+        """Store a downloaded body, sharing the blob with identical bodies."""
+        if self.max_bytes == 0:
+            return
+        body_hash = hashlib.sha256(content).hexdigest()
+        now = datetime.now(timezone.utc).isoformat()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT blob, size FROM pages WHERE body_hash=? LIMIT 1", (body_hash,)
+            ).fetchone()
+            if row and self.blob_path(row[0]).exists():
+                blob, size = row
+            else:
+                suffix, data = compress(content)
+                blob, size = body_hash + suffix, len(data)
+                path = self.blob_path(blob)
+                path.parent.mkdir(exist_ok=True)
+                tmp_path = path.with_name(path.name + ".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages(id, url, body_hash, blob, encoding, size, stored_at, accessed_at) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                (SeenIndex.url_id(url), url, body_hash, blob, encoding, size, now, now)
+            )
+            self.conn.commit()
+            self.evict()
+
+    def total_bytes(self) -> int:
+        """Compressed size of all distinct blobs."""
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT size FROM pages GROUP BY blob)"
+        ).fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the blobs fit in max_bytes."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        cur = self.conn.execute("SELECT id, blob, size FROM pages ORDER BY accessed_at")
+        for url_id, blob, size in cur.fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM pages WHERE id=?", (url_id,))
+            if not self.conn.execute("SELECT 1 FROM pages WHERE blob=? LIMIT 1", (blob,)).fetchone():
+                self.blob_path(blob).unlink(missing_ok=True)
+                total -= size
+        self.conn.commit()
+
+    def urls(self) -> list:
+        """Return every cached URL, most recently stored first."""
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT url FROM pages ORDER BY stored_at DESC")]
@@ -0,0 +1,158 @@
+"""
+Concurrent image downloads for drafts.
+
+Images are streamed to disk in chunks on a small thread pool while the draft
+text is being summarised. Responses that announce a non-image type or a size
+over the limit are dropped before their body is read, and files are named
+by the SHA-256 of their content with the extension of their real type, so
+the same picture served from several CDN URLs is stored once.
+"""
+
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/pjpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/avif": ".avif",
+    "image/svg+xml": ".svg",
+    "image/bmp": ".bmp",
+}
+
+
+class ImageFetcher:
+    """Download images concurrently into a content-addressed directory."""
+
+    def __init__(self, session: requests.Session, user_agents: list, images_dir: str,
+                 conn: sqlite3.Connection = None, max_bytes: int = 5 * 1024 * 1024,
+                 workers: int = 4, timeout: int = 15, metrics=None):
+        """Initialize with a shared session and the images directory.
+
+        metrics, if given, is a metrics.Metrics that records timings, bytes and errors.
+        """
+        self.session = session
+        self.user_agents = user_agents
+        self.images_dir = Path(images_dir)
+        self.conn = conn
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.metrics = metrics
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        if self.conn is not None:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS images (
+                    url TEXT PRIMARY KEY,
+                    file_name TEXT,
+                    fetched_at TEXT
+                )
+            """)
+
+    def download(self, url: str) -> Path:
+        """Stream one image to disk and return its path, or None if rejected."""
+        if self.metrics is None:
+            return self._download(url)
+        with self.metrics.timer("image_download"):
+            return self._download(url)
+
+    def _download(self, url: str) -> Path:
+        headers = {
+            "User-Agent": random.choice(self.user_agents),
+            "Accept": "image/webp,image/apng,image/*,*/*;q=0.8",
+            "Referer": "https://www.google.com/"
+        }
+        try:
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if self.metrics is not None:
+                    self.metrics.http_status("image_download", response.status_code)
+                response.raise_for_status()
+
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                extension = EXTENSIONS.get(content_type)
+                if extension is None:
+                    return None
+                if int(response.headers.get("Content-Length") or 0) > self.max_bytes:
+                    return None
+
+                digest = hashlib.sha256()
+                size = 0
+                fd, tmp_name = tempfile.mkstemp(dir=self.images_dir, suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        for chunk in response.iter_content(64 * 1024):
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                raise ValueError("image too large")
+                            digest.update(chunk)
+                            f.write(chunk)
+
+                    if self.metrics is not None:
+                        self.metrics.add_bytes("image_download", size)
+                    image_path = self.images_dir / f"{digest.hexdigest()[:20]}{extension}"
+                    if image_path.exists():
+                        os.unlink(tmp_name)
+                    else:
+                        os.replace(tmp_name, image_path)
+                    return image_path
+                except BaseException:
+                    if os.path.exists(tmp_name):
+                        os.unlink(tmp_name)
+                    raise
+        except requests.exceptions.RequestException:
+            if self.metrics is not None:
+                self.metrics.host_error("image_download", urlparse(url).netloc)
+            return None
+        except (ValueError, OSError):
+            return None
+
+    def fetch_all(self, urls: list) -> list:
+        """Start downloads for urls and return futures of their paths.
+
+        URLs already downloaded on an earlier run resolve immediately.
+        Must be called from the thread that owns conn.
+        """
+        known = self.lookup(urls)
+        futures = []
+        for url in urls:
+            if self.metrics is not None:
+                self.metrics.cache_lookup("image", url in known)
+            if url in known:
+                futures.append(self.pool.submit(lambda path=known[url]: path))
+            else:
+                futures.append(self.pool.submit(self.download, url))
+        return futures
+
+    def lookup(self, urls: list) -> dict:
+        """Return {url: path} for URLs whose file is already in images_dir."""
+        if self.conn is None or not urls:
+            return {}
+        placeholders = ",".join("?" * len(urls))
+        rows = self.conn.execute(f"SELECT url, file_name FROM images WHERE url IN ({placeholders})", urls)
+        found = {url: self.images_dir / file_name for url, file_name in rows}
+        return {url: path for url, path in found.items() if path.exists()}
+
+    def record(self, url: str, path: Path):
+        """Remember which file a URL was saved as."""
+        if self.conn is None or path is None:
+            return
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO images(url, file_name, fetched_at) VALUES(?, ?, ?)",
+                (url, path.name, datetime.now(timezone.utc).isoformat())
+            )
+
+    def shutdown(self):
+        """Wait for running downloads and stop the pool."""
+        self.pool.shutdown()
@@ -0,0 +1,123 @@
+"""
+Precompiled keyword matching for ranking and summarisation.
+
+All must_have, nice_to_have and avoid keywords are compiled into one
+prefix-sharing alternation with word boundaries and matched against the
+lowercased text, so a text is scanned once no matter how many keywords are
+configured. Matchers are cached per keyword configuration and only rebuilt
+when KEYWORDS changes.
+"""
+
+import re
+from functools import lru_cache
+
+CATEGORIES = ("must_have", "nice_to_have", "avoid")
+
+
+def trie_pattern(words: list) -> str:
+    """Build a regex alternation that shares common prefixes between words."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        # Longer matches are tried first; the trailing ? falls back to the shorter word
+        return "(?:" + "|".join(branches) + ")" + ("?" if "" in node else "")
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Find every configured keyword in a text with a single regex pass."""
+
+    def __init__(self, keywords: dict):
+        """Compile the matcher from a KEYWORDS config mapping."""
+        self.categories = {}
+        for category in CATEGORIES:
+            for keyword in keywords.get(category, []):
+                keyword = keyword.strip().lower()
+                if keyword:
+                    self.categories.setdefault(keyword, set()).add(category)
+
+        # The keywords are folded into a character trie so the regex engine
+        # follows one branch per position however many keywords there are.
+        # It runs case-sensitively on lowercased text, which is several times
+        # faster than re.IGNORECASE, and \b is cheaper than a lookbehind when
+        # every keyword starts with a word character. The match sits in a
+        # lookahead and is read from group 1, so nothing is consumed and a
+        # phrase starting inside another one ("learning rate" in "machine
+        # learning rate") is still found at its own offset.
+        words = list(self.categories)
+        left = r"\b" if all(re.match(r"\w", k) for k in words) else r"(?<!\w)"
+        self.pattern = re.compile(left + "(?=(" + trie_pattern(words) + r")(?!\w))") if words else None
+
+        # Only the longest keyword is reported per offset, so a phrase hit
+        # also counts every shorter keyword it contains
+        self.contained = {
+            keyword: {
+                other for other in self.categories
+                if other != keyword and re.search(r"(?<!\w)" + re.escape(other) + r"(?!\w)", keyword)
+            }
+            for keyword in self.categories
+        }
+
+    def scan(self, lowered: str):
+        """Yield (offset, keyword) for the longest keyword starting at each offset of lowercased text."""
+        if self.pattern is None or not lowered:
+            return
+        for match in self.pattern.finditer(lowered):
+            yield match.start(), match.group(1)
+
+    def matches(self, text: str):
+        """Yield (offset, keyword) for every keyword occurrence in text."""
+        for offset, keyword in self.scan(text.lower() if text else ""):
+            yield offset, keyword
+            for other in self.contained.get(keyword, ()):
+                yield offset, other
+
+    def hits(self, text: str) -> set:
+        """Return the set of distinct keywords present in text."""
+        if self.pattern is None or not text:
+            return set()
+        # findall skips building a match object per hit; offsets aren't needed here
+        found = set(self.pattern.findall(text.lower()))
+        for keyword in list(found):
+            found.update(self.contained.get(keyword, ()))
+        return found
+
+    def counts(self, text: str) -> dict:
+        """Return the number of distinct keyword hits per category."""
+        counts = dict.fromkeys(CATEGORIES, 0)
+        for keyword in self.hits(text):
+            for category in self.categories.get(keyword, ()):
+                counts[category] += 1
+        return counts
+
+    def score(self, text: str) -> float:
+        """Score content based on keyword presence (0.0-2.0)."""
+        counts = self.counts(text)
+        if not counts["must_have"]:
+            return 0.0
+
+        score = 1.0
+        score += 0.2 * counts["nice_to_have"]
+        score -= 0.5 * counts["avoid"]
+        return max(0.0, min(2.0, score))  # Cap at 2.0
+
+
+@lru_cache(maxsize=8)
+def _build(frozen: tuple) -> KeywordMatcher:
+    return KeywordMatcher({category: list(words) for category, words in frozen})
+
+
+def keyword_matcher(keywords: dict) -> KeywordMatcher:
+    """Return the cached matcher for a KEYWORDS mapping."""
+    return _build(tuple((category, tuple(keywords.get(category, []))) for category in CATEGORIES))
@@ -5,39 +5,91 @@ This tool collects cybersecurity/AI news from RSS feeds while avoiding detection
 creating ready-to-publish Medium drafts with simple summarization.
 """
 
-import hashlib
-import math
+import argparse
+import calendar
 import os
 import random
 import re
+import signal
 import sqlite3
 import textwrap
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import cached_property
 from pathlib import Path
 from urllib.parse import urlparse
 
-import feedparser
-import frontmatter
 import requests
 import yaml
-from bs4 import BeautifulSoup
-from dateutil import parser as dateparser
-from markdownify import markdownify as md
-from readability import Document
+
+from drafts_catalog import DraftCatalog
+from extraction import ExtractionPool, header_charset
+from feed_fetcher import FeedCache, FeedFetcher
+from feed_scheduler import FeedSchedule
+from html_cache import HtmlCache
+from http_body import read_capped
+from keyword_matcher import keyword_matcher
+from metrics import Metrics
+from pipeline import Pipeline, Stage
+from politeness import HostScheduler
+from profiling import Profiler
+from seen_index import SeenIndex
+from topk import StreamingTopK
 
 
 class ContentAggregator:
     """Main class with enhanced anti-blocking features."""
 
-    def __init__(self, config_path: str = None):
-        """Initialize with configuration."""
+    def __init__(self, config_path: str = None, read_only: bool = False):
+        """Initialize with configuration.
+
+        read_only sets up only the feed and seen layers that check() uses,
+        with state.db opened for reading, so nothing is created or written.
+        """
         self.config = self.load_config(config_path)
-        self.db_conn = self.connect_db()
-        self.ensure_dirs()
+        self.db_conn = self.connect_db(read_only)
+        self.seen_index = SeenIndex(
+            self.db_conn,
+            batch_size=self.config["OUTPUT"].get("SEEN_BATCH_SIZE", 100),
+            bloom_path=Path(self.config["OUTPUT"]["DB_PATH"]).with_suffix(".bloom"),
+            read_only=read_only,
+        )
         self.session = requests.Session()
         self.user_agents = self.load_user_agents()
         self.cookies = {}
+        self.scheduler = HostScheduler(
+            min_interval=self.config["REQUEST_SETTINGS"].get(
+                "HOST_MIN_INTERVAL", self.config["REQUEST_SETTINGS"]["THROTTLE_DELAY"]
+            ),
+            jitter=self.config["REQUEST_SETTINGS"].get("HOST_JITTER", 0.5),
+        )
+        self.feed_fetcher = self.make_feed_fetcher()
+        self.feed_cache = FeedCache(self.db_conn)
+        self.metrics = Metrics()
+        self.profiler = Profiler(enabled=False)
+        self.feed_report = []
+        if read_only:
+            return
+        self.ensure_dirs()
+        self.extractor = ExtractionPool(self.config.get("PROCESSING", {}).get("EXTRACT_WORKERS"))
+        self.html_cache = HtmlCache(
+            self.config["OUTPUT"].get("CACHE_DIR", "cache"),
+            max_bytes=self.config["OUTPUT"].get("CACHE_MAX_MB", 256) * 1024 * 1024,
+        )
+        self.drafts = DraftCatalog(self.db_conn)
+
+    @cached_property
+    def near_dups(self):
+        """Near-duplicate index, opened on first use so runs with nothing new never load NumPy."""
+        from near_dup import NearDupIndex
+
+        return NearDupIndex(
+            self.db_conn,
+            threshold=self.config.get("PROCESSING", {}).get("NEAR_DUP_THRESHOLD", 0.5),
+            max_age_days=self.config.get("PROCESSING", {}).get("NEAR_DUP_DAYS", 14),
+        )
 
     @staticmethod
     def load_config(config_path: str = None) -> dict:
@@ -67,11 +119,37 @@ class ContentAggregator:
                 "TIMEOUT": 30,
                 "THROTTLE_DELAY": 3.0,
                 "RETRY_ATTEMPTS": 3,
+                "ASYNC_FEEDS": True,
+                "FEED_CONCURRENCY": 16,
+                "FEED_PER_HOST": 2,
+                "HOST_MIN_INTERVAL": 3.0,
+                "HOST_JITTER": 0.5,
+                "ARTICLE_WORKERS": 8,
             },
             "OUTPUT": {
                 "TOP_K": 5,
                 "OUT_DIR": "drafts",
                 "DB_PATH": "state.db",
+                "CACHE_DIR": "cache",
+                "CACHE_MAX_MB": 256,
+                "METRICS_DIR": "metrics",
+            },
+            "DAEMON": {
+                "MIN_INTERVAL": 300,
+                "MAX_INTERVAL": 21600,
+                "DEFAULT_INTERVAL": 1800,
+                "JITTER": 0.1,
+            },
+            "PROCESSING": {
+                "EXTRACT_WORKERS": os.cpu_count() or 1,
+                "SUMMARIZER": "heuristic",
+                "NEAR_DUP_THRESHOLD": 0.5,
+                "NEAR_DUP_DAYS": 14,
+                "PARSE_WORKERS": 2,
+                "SCORE_WORKERS": 2,
+                "RENDER_WORKERS": 2,
+                "QUEUE_SIZE": 64,
+                "SPECULATIVE_EXTRACTIONS": 2,
             },
         }
         
@@ -99,9 +177,34 @@ class ContentAggregator:
             "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1"
         ]
 
-    def connect_db(self) -> sqlite3.Connection:
-        """Initialize database connection."""
-        conn = sqlite3.connect(self.config["OUTPUT"]["DB_PATH"])
+    def make_feed_fetcher(self) -> FeedFetcher:
+        """Build the concurrent feed fetcher from request settings."""
+        settings = self.config["REQUEST_SETTINGS"]
+        return FeedFetcher(
+            session=self.session,
+            user_agents=self.user_agents,
+            timeout=settings["TIMEOUT"],
+            concurrency=settings.get("FEED_CONCURRENCY", 16),
+            per_host=settings.get("FEED_PER_HOST", 2),
+        )
+
+    def connect_db(self, read_only: bool = False) -> sqlite3.Connection:
+        """Initialize database connection.
+
+        read_only opens an existing state.db without write access; an empty
+        in-memory database stands in for a missing or uninitialised one.
+        """
+        path = Path(self.config["OUTPUT"]["DB_PATH"])
+        if read_only and path.exists():
+            # Without a -wal file no one has the database open for writing, and
+            # immutable stops SQLite creating -wal/-shm files just to read it
+            immutable = "" if Path(f"{path}-wal").exists() else "&immutable=1"
+            conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro{immutable}", uri=True)
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            if {"seen", "feed_cache"} <= tables:
+                return conn
+            conn.close()
+        conn = sqlite3.connect(":memory:" if read_only else path)
         conn.execute("""
             CREATE TABLE IF NOT EXISTS seen (
                 id TEXT PRIMARY KEY,
@@ -120,6 +223,9 @@ class ContentAggregator:
                 published BOOLEAN DEFAULT 0
             )
         """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_added_at ON seen(added_at)")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         return conn
 
     def ensure_dirs(self):
@@ -128,18 +234,15 @@ class ContentAggregator:
 
     def is_seen(self, url: str) -> bool:
         """Check if URL has been processed before."""
-        url_hash = hashlib.sha256(url.encode()).hexdigest()
-        cur = self.db_conn.execute("SELECT 1 FROM seen WHERE id=?", (url_hash,))
-        return cur.fetchone() is not None
+        return self.seen_index.is_seen(url)
+
+    def seen_many(self, urls: list) -> set:
+        """Return which of the given URLs have been processed before."""
+        return self.seen_index.seen_many(urls)
 
     def mark_seen(self, url: str, processed: bool = False):
-        """Mark URL as seen in database."""
-        url_hash = hashlib.sha256(url.encode()).hexdigest()
-        self.db_conn.execute(
-            "INSERT OR IGNORE INTO seen(id, url, added_at, processed) VALUES(?, ?, ?, ?)",
-            (url_hash, url, datetime.now(timezone.utc).isoformat(), processed)
-        )
-        self.db_conn.commit()
+        """Mark URL as seen; rows are committed in batches."""
+        self.seen_index.mark_seen(url, processed)
 
     @staticmethod
     def domain_of(url: str) -> str:
@@ -172,11 +275,12 @@ class ContentAggregator:
                 "Origin": "https://www.google.com"
             })
 
+        host = self.domain_of(url)
         for attempt in range(self.config["REQUEST_SETTINGS"]["RETRY_ATTEMPTS"]):
             try:
-                # Rotate user agents and add random delays
+                # Rotate user agents and wait for this host's politeness slot
                 headers["User-Agent"] = random.choice(self.user_agents)
-                time.sleep(random.uniform(1.0, self.config["REQUEST_SETTINGS"]["THROTTLE_DELAY"]))
+                self.scheduler.acquire(host)
 
                 resp = self.session.get(
                     url,
@@ -184,27 +288,44 @@ class ContentAggregator:
                     cookies=self.cookies,
                     timeout=self.config["REQUEST_SETTINGS"]["TIMEOUT"],
                     allow_redirects=True,
+                    stream=True,
                 )
+                self.metrics.http_status("article_fetch", resp.status_code)
+
+                # Back off the whole host when it asks us to slow down
+                if resp.status_code in (429, 503):
+                    resp.close()
+                    self.scheduler.defer(host, self.scheduler.retry_after(resp.headers, default=2 ** attempt))
+                    raise requests.exceptions.RequestException(f"{resp.status_code} rate limited")
 
                 # Check for soft blocks
                 if resp.status_code == 403:
+                    resp.close()
                     raise requests.exceptions.RequestException("403 Forbidden")
 
+                if resp.status_code >= 400:
+                    resp.close()
                 resp.raise_for_status()
 
-                # Check for CAPTCHA pages
-                if any(x in resp.text.lower() for x in ["captcha", "cloudflare", "access denied"]):
-                    raise requests.exceptions.RequestException("CAPTCHA detected")
+                # Read at most MAX_CONTENT_LENGTH bytes; block pages are caught from the first few KB
+                blocked = read_capped(resp, self.config["REQUEST_SETTINGS"].get("MAX_CONTENT_LENGTH", 200000))
+                self.metrics.add_bytes("article_fetch", len(resp.content))
+                if blocked:
+                    raise requests.exceptions.RequestException(blocked)
 
                 return resp
 
             except requests.exceptions.RequestException as e:
                 if attempt == self.config["REQUEST_SETTINGS"]["RETRY_ATTEMPTS"] - 1:
+                    self.metrics.host_error("article_fetch", host)
                     raise
-                time.sleep(2 ** attempt)  # Exponential backoff
+                self.metrics.inc("http_retries", stage="article_fetch")
+                self.scheduler.defer(host, 2 ** attempt)  # Exponential backoff
 
     def parse_date(self, entry) -> datetime:
         """Parse date from feed entry with multiple fallbacks."""
+        from dateutil import parser as dateparser
+
         date_fields = ["published", "updated", "created", "pubDate"]
         for field in date_fields:
             if hasattr(entry, field):
@@ -214,74 +335,58 @@ class ContentAggregator:
                     continue
         return datetime.now(timezone.utc)
 
-    def freshness_score(self, dt: datetime) -> float:
-        """Calculate freshness score (0.0-1.0)."""
-        if not dt:
-            return 0.4
-        age_hours = (datetime.now(timezone.utc) - dt).total_seconds() / 3600
-        return math.exp(-age_hours * math.log(2) / 168)  # 7-day half-life
-
     def keyword_score(self, text: str) -> float:
         """Score content based on keyword presence."""
-        text_lower = text.lower()
-        kw = self.config["KEYWORDS"]
-        
-        if not any(k.lower() in text_lower for k in kw["must_have"]):
-            return 0.0
-            
-        score = 1.0
-        score += 0.2 * sum(1 for k in kw["nice_to_have"] if k.lower() in text_lower)
-        score -= 0.5 * sum(1 for k in kw["avoid"] if k.lower() in text_lower)
-        return max(0.0, min(2.0, score))  # Cap at 2.0
+        return keyword_matcher(self.config["KEYWORDS"]).score(text)
 
-    def rank_item(self, entry: dict) -> float:
-        """Score and rank a feed entry."""
-        title = entry.get("title", "")
-        summary = BeautifulSoup(entry.get("summary", ""), "html.parser").get_text(" ")
-        url = entry.get("link", "")
-        host = self.domain_of(url)
-        dt = self.parse_date(entry)
+    def rank_batch(self, entries: list, now: float = None) -> list:
+        """Score feed entries as one batch, measuring every age from the same now."""
+        from ranking import BatchRanker
 
-        text = f"{title}\n\n{summary}"
-        ks = self.keyword_score(text)
-        fs = self.freshness_score(dt)
-        sw = self.config["SOURCE_WEIGHTS"].get(host, 1.0)
+        ranker = BatchRanker(self.config["KEYWORDS"], self.config["SOURCE_WEIGHTS"], self.domain_of, self.parse_date)
+        return ranker.scores(entries, now).tolist()
 
-        return (0.6 * ks) + (0.3 * fs) + (0.1 * sw)
+    def rank_item(self, entry: dict) -> float:
+        """Score and rank a feed entry."""
+        return self.rank_batch([entry])[0]
 
-    def extract_readable(self, url: str) -> dict:
-        """Robust content extraction with error handling."""
+    def extract_readable(self, url: str, offline: bool = False) -> dict:
+        """Fetch an article (from the HTML cache if present) and extract it in the process pool."""
         try:
-            resp = self.safe_get(url)
-            
-            doc = Document(resp.text)
-            title = doc.title() or ""
-            soup = BeautifulSoup(doc.summary(), "html.parser")
-            
-            # Clean content
-            for tag in ["script", "style", "nav", "footer", "form", "iframe", "aside"]:
-                for element in soup.find_all(tag):
-                    element.decompose()
-                    
-            text = soup.get_text("\n", strip=True)
-            text = re.sub(r"\n{3,}", "\n\n", text)
-            
-            if len(text) < self.config["REQUEST_SETTINGS"]["MIN_CONTENT_LENGTH"]:
-                return {"ok": False, "error": "Content too short", "text": text, "title": title}
-                
-            return {
-                "ok": True,
-                "title": title,
-                "text": text,
-                "markdown": md(str(soup)),
-                "url": url
-            }
-            
+            cached = self.html_cache.get(url)
+            self.metrics.cache_lookup("html", cached is not None)
+            if cached:
+                content, encoding = cached
+            elif offline:
+                return {"ok": False, "error": "Not in cache", "text": "", "title": ""}
+            else:
+                with self.metrics.timer("article_fetch"):
+                    resp = self.safe_get(url)
+                content, encoding = resp.content, header_charset(resp.headers.get("Content-Type"))
+                self.html_cache.put(url, content, encoding)
+
+            future = self.extractor.submit(
+                content,
+                url,
+                encoding,
+                min_length=self.config["REQUEST_SETTINGS"]["MIN_CONTENT_LENGTH"],
+            )
+            result = future.result()
+            # Extraction runs in another process, so its steps are timed there
+            for stage, seconds in result.get("timings", {}).items():
+                self.metrics.observe(stage, seconds)
+            return result
+
         except Exception as e:
             return {"ok": False, "error": str(e), "text": "", "title": ""}
 
     def simple_summarize(self, text: str) -> tuple:
-        """Extractive summarization using heuristic methods."""
+        """Extractive summarization with the configured engine (heuristic or textrank)."""
+        if self.config.get("PROCESSING", {}).get("SUMMARIZER", "heuristic") == "textrank":
+            from textrank import TextRankSummarizer
+
+            return TextRankSummarizer(keyword_matcher(self.config["KEYWORDS"])).summarize(text)
+
         sentences = re.split(r"(?<=[.!?])\s+", text)
         if len(sentences) < 3:
             return text[:500], text
@@ -303,7 +408,8 @@ class ContentAggregator:
         link = entry.get("link", "")
         domain = self.domain_of(link)
         
-        summary, bullets = self.simple_summarize(extracted.get("text", ""))
+        with self.metrics.timer("summarize"):
+            summary, bullets = self.simple_summarize(extracted.get("text", ""))
         
         body = f"""# {title}
 
@@ -318,6 +424,8 @@ class ContentAggregator:
 ---
 *Source: [{domain}]({link}). Automatically summarized for educational purposes.*
 """
+        import frontmatter
+
         post = frontmatter.Post(body)
         post.metadata.update({
             "title": title,
@@ -329,91 +437,394 @@ class ContentAggregator:
         
         return frontmatter.dumps(post)
 
-    def save_draft(self, content: str, title: str) -> str:
-        """Save draft with proper filename."""
+    def save_draft(self, content: str, title: str, candidate: dict = None) -> str:
+        """Save draft with proper filename and register it in the drafts catalogue."""
         safe_title = re.sub(r'[^\w\s-]', '', title).strip().lower()
         safe_title = re.sub(r'[-\s]+', '-', safe_title)[:50]
         filename = f"{datetime.now().strftime('%Y%m%d')}-{safe_title}.md"
         filepath = Path(self.config["OUTPUT"]["OUT_DIR"]) / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with self.metrics.timer("draft_write"), open(filepath, 'w', encoding='utf-8') as f:
             f.write(content)
-            
+
+        candidate = candidate or {}
+        link = candidate.get("link", "")
+        self.drafts.add(filepath, title, content, url=link, source=self.domain_of(link), score=candidate.get("score"))
         return str(filepath)
 
-    def fetch_candidates(self) -> list:
-        """Fetch and parse all feed sources."""
+    def fetch_candidates(self, sources: list = None, store: bool = True) -> list:
+        """Fetch feed sources (all configured ones by default) concurrently and parse the downloaded bytes.
+
+        With store=False the feeds' ETag/Last-Modified are not saved, so a
+        later run still downloads what this call saw.
+        """
         candidates = []
-        
-        for source in self.config["SOURCES"]:
-            try:
-                feed = feedparser.parse(source)
-                if feed.bozo and feed.bozo_exception:
-                    continue
-                    
-                for entry in feed.entries:
-                    if not entry.get("link"):
-                        continue
-                        
-                    candidates.append({
-                        "title": entry.get("title", ""),
-                        "summary": entry.get("summary", ""),
-                        "link": entry.get("link", ""),
-                        "entry": entry,
-                        "source": source
-                    })
-                    
-            except Exception:
-                continue
-                
+        sources = self.config["SOURCES"] if sources is None else sources
+        use_async = self.config["REQUEST_SETTINGS"].get("ASYNC_FEEDS", True)
+        validators = self.feed_cache.load(sources)
+        self.feed_report = self.feed_fetcher.fetch_all(
+            sources, use_async=use_async, validators=validators
+        )
+
+        for result in self.feed_report:
+            candidates.extend(self.parse_feed(result))
+            if store:
+                self.feed_cache.store(result)
+
         return candidates
 
-    def process(self):
+    def fetch_feed(self, source: str, validators: dict = None) -> dict:
+        """Download one feed within the per-host limit and add it to this run's feed report."""
+        result = self.feed_fetcher.fetch_limited(source, validators)
+        self.feed_report.append(result)
+        return result
+
+    def parse_feed(self, result: dict) -> list:
+        """Record one downloaded feed's metrics and return its entries as candidates.
+
+        Failed and unchanged feeds give no candidates. Nothing here touches
+        state.db, so pipeline workers can call it.
+        """
+        import feedparser
+
+        self.record_feed_metrics(result)
+        if not result["ok"] or result["not_modified"]:
+            return []
+
+        with self.metrics.timer("feed_parse"):
+            feed = feedparser.parse(result["content"], response_headers=result["headers"])
+        # The raw bytes are not needed again; don't keep every feed in memory until the run ends
+        result["content"] = b""
+        if feed.bozo and feed.bozo_exception:
+            self.metrics.host_error("feed_parse", self.domain_of(result["source"]))
+            result["ok"] = False
+            result["error"] = f"Parse error: {feed.bozo_exception}"
+            return []
+
+        result["entries"] = len(feed.entries)
+        # Publish times drive the adaptive polling interval in daemon mode
+        result["entry_times"] = [
+            calendar.timegm(entry.get("published_parsed") or entry.get("updated_parsed"))
+            for entry in feed.entries if entry.get("published_parsed") or entry.get("updated_parsed")
+        ]
+        return [
+            {
+                "title": entry.get("title", ""),
+                "summary": entry.get("summary", ""),
+                # Feedburner wraps links in redirects; prefer the original URL
+                "link": entry.get("feedburner_origlink") or entry.get("link", ""),
+                "entry": entry,
+                "source": result["source"]
+            }
+            for entry in feed.entries if entry.get("link")
+        ]
+
+    def record_feed_metrics(self, result: dict):
+        """Record timing, status, size and cache use of one feed download."""
+        self.metrics.observe("feed_fetch", result["elapsed"])
+        if result["status"]:
+            self.metrics.http_status("feed_fetch", result["status"])
+        if result["ok"]:
+            self.metrics.add_bytes("feed_fetch", len(result["content"]))
+            self.metrics.cache_lookup("feed", result["not_modified"])
+        else:
+            self.metrics.host_error("feed_fetch", self.domain_of(result["source"]))
+
+    def write_metrics(self):
+        """Write this run's metrics as JSON and as a Prometheus textfile."""
+        try:
+            json_path, prom_path = self.metrics.write(self.config["OUTPUT"].get("METRICS_DIR", "metrics"))
+            print(f"Metrics written to {json_path} and {prom_path}")
+        except OSError as e:
+            print(f"  ! Could not write metrics: {e}")
+
+    def enable_profiling(self):
+        """Profile the following runs; extraction then runs in-process so the profilers see it."""
+        self.profiler = Profiler()
+        self.extractor.workers = 0
+
+    def write_profile(self):
+        """Stop the profiler and write its files next to the drafts."""
+        self.profiler.stop()
+        for path in self.profiler.write(self.config["OUTPUT"]["OUT_DIR"]):
+            print(f"Profile written to {path}")
+
+    def report_feeds(self):
+        """Print per-feed timing and failures from the last fetch."""
+        for result in self.feed_report:
+            if result["ok"] and result["not_modified"]:
+                print(f"  = {result['source']} (unchanged, {result['elapsed']:.2f}s)")
+            elif result["ok"]:
+                print(f"  ✓ {result['source']} ({result.get('entries', 0)} entries, {result['elapsed']:.2f}s)")
+            else:
+                print(f"  ✗ {result['source']} ({result['elapsed']:.2f}s): {result['error']}")
+
+    def check(self) -> int:
+        """Count feed entries not processed yet, touching only the feed and seen layers.
+
+        No article, ranking or extraction code is loaded; on an aggregator
+        built with read_only=True nothing is written either. Returns the
+        number of new candidates.
+        """
+        candidates = self.fetch_candidates(store=False)
+        self.report_feeds()
+        links = list(dict.fromkeys(candidate["link"] for candidate in candidates))
+        seen = self.seen_many(links)
+        new = [link for link in links if link not in seen]
+        for link in new:
+            print(f"  + {link}")
+        print(f"{len(new)} new of {len(links)} candidates")
+        return len(new)
+
+    def build_pipeline(self, validators: dict, finalists: StreamingTopK, counts: dict) -> Pipeline:
+        """Stages of one run, from feed URLs to rendered drafts of the candidates in finalists.
+
+        dedup and select run on the calling thread, as they read state.db and
+        keep the run's bookkeeping; counts collects how many candidates and
+        near-duplicates they saw.
+        """
+        settings = self.config["REQUEST_SETTINGS"]
+        processing = self.config.get("PROCESSING", {})
+        queue_size = processing.get("QUEUE_SIZE", 64)
+        self.feed_report = []
+        run_links = set()
+        # Every feed's entries are aged against the same moment
+        now = time.time()
+        clusters = []
+
+        def fetch(source):
+            return [self.fetch_feed(source, validators.get(source))]
+
+        def parse(result):
+            # One batch per feed, so dedup looks a whole feed up in the seen index at once
+            return [self.parse_feed(result)]
+
+        def dedup(candidates):
+            counts["candidates"] += len(candidates)
+            with self.metrics.timer("dedup"):
+                seen = self.seen_many([candidate["link"] for candidate in candidates])
+            fresh = []
+            for candidate in candidates:
+                # The same article is often listed by more than one feed
+                if candidate["link"] in seen or candidate["link"] in run_links:
+                    continue
+                run_links.add(candidate["link"])
+                fresh.append(candidate)
+            # Still one batch, so the whole feed is ranked in one go
+            return [fresh] if fresh else []
+
+        def score(candidates):
+            with self.metrics.timer("rank"):
+                scores = self.rank_batch([candidate.pop("entry") for candidate in candidates], now)
+            passed = []
+            for candidate, value in zip(candidates, scores):
+                candidate["score"] = value
+                if value > 0.5:  # Minimum quality threshold
+                    passed.append(candidate)
+            return passed
+
+        def select(candidate):
+            if not clusters:
+                from near_dup import RunClusters
+                clusters.append(RunClusters(self.near_dups))
+            # Keep only the best-scoring copy of each syndicated story
+            with self.metrics.timer("dedup"):
+                accepted, replaced = clusters[0].offer(candidate)
+            outputs = []
+            if replaced is not None:
+                counts["duplicates"] += 1
+                backfill = finalists.remove(replaced)
+                if backfill is not None:
+                    self.metrics.inc("topk_backfills", reason="duplicate")
+                    outputs.append(backfill)
+            if not accepted:
+                counts["duplicates"] += 1
+                return outputs
+            admitted, _ = finalists.offer(candidate)
+            if admitted:
+                outputs.append(candidate)
+            return outputs
+
+        def extract(candidate):
+            # A better candidate may have pushed it out while it waited. On
+            # failure the best candidate outside the window takes the slot.
+            outputs = []
+            while candidate is not None and finalists.holds(candidate):
+                # Candidates back from the reserve may have been extracted already
+                if not candidate.get("draft") and "extracted" not in candidate:
+                    candidate["extracted"] = self.profiler.wrap(self.extract_readable)(candidate["link"])
+                outputs.append(candidate)
+                if candidate.get("draft") or candidate["extracted"]["ok"]:
+                    break
+                candidate = finalists.remove(candidate)
+                if candidate is not None:
+                    self.metrics.inc("topk_backfills", reason="extract")
+            return outputs
+
+        def render(candidate):
+            if not candidate.get("draft") and candidate["extracted"]["ok"] and finalists.holds(candidate):
+                candidate["draft"] = self.make_draft(candidate, candidate["extracted"])
+            return [candidate]
+
+        return Pipeline([
+            Stage("fetch", fetch, settings.get("FEED_CONCURRENCY", 16), queue_size),
+            Stage("parse", parse, processing.get("PARSE_WORKERS", 2), queue_size),
+            Stage("dedup", dedup, 0, queue_size),
+            Stage("score", score, processing.get("SCORE_WORKERS", 2), queue_size),
+            Stage("select", select, 0, queue_size),
+            # Best-scoring candidates are downloaded first
+            Stage("extract", extract, settings.get("ARTICLE_WORKERS", 8), queue_size,
+                  priority=lambda candidate: -candidate["score"]),
+            Stage("render", render, processing.get("RENDER_WORKERS", 2), queue_size),
+        ], profiler=self.profiler)
+
+    def process(self, sources: list = None):
         """Main processing pipeline."""
         print(f"Starting aggregation for: {self.config['NICHE']}")
-        
-        candidates = self.fetch_candidates()
-        print(f"Found {len(candidates)} candidates")
-        
-        # Score and filter
-        scored = []
-        for candidate in candidates:
-            if self.is_seen(candidate["link"]):
-                continue
-                
-            try:
-                candidate["score"] = self.rank_item(candidate["entry"])
-                if candidate["score"] > 0.5:  # Minimum quality threshold
-                    scored.append(candidate)
-            except Exception:
-                continue
-                
-        # Process top candidates
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        for i, candidate in enumerate(scored[:self.config["OUTPUT"]["TOP_K"]]):
-            print(f"\nProcessing {i+1}/{len(scored[:self.config['OUTPUT']['TOP_K']])}: {candidate['title'][:50]}...")
-            
-            try:
-                time.sleep(random.uniform(1.0, self.config["REQUEST_SETTINGS"]["THROTTLE_DELAY"]))
-                extracted = self.extract_readable(candidate["link"])
-                
-                if not extracted["ok"]:
-                    print(f"  ✗ {extracted['error']}")
+        self.metrics.reset()
+        self.profiler.start()
+        sources = self.config["SOURCES"] if sources is None else sources
+        finalists = StreamingTopK(
+            self.config["OUTPUT"]["TOP_K"],
+            key=lambda candidate: candidate["score"],
+            spare=self.config.get("PROCESSING", {}).get("SPECULATIVE_EXTRACTIONS", 2),
+        )
+        counts = {"candidates": 0, "duplicates": 0}
+        pipeline = self.build_pipeline(self.feed_cache.load(sources), finalists, counts)
+
+        # Articles from the first feeds are extracted while later feeds are still downloading
+        with self.profiler.stage("pipeline"):
+            for candidate in pipeline.run(sources):
+                extracted = candidate.get("extracted")
+                if extracted is None:
                     continue
-                    
-                draft = self.make_draft(candidate, extracted)
-                draft_path = self.save_draft(draft, candidate["title"])
-                
+                if not extracted["ok"]:
+                    print(f"  ✗ {candidate['title'][:50]}: {extracted['error']}")
+                elif candidate.get("draft"):
+                    # Only the rendered draft is kept until the run ends
+                    del candidate["extracted"]
+                    print(f"  · {candidate['title'][:50]} (extracted in {extracted['elapsed']:.2f}s)")
+        for stage, error in pipeline.errors:
+            print(f"  ! Error in {stage}: {error}")
+        for result in self.feed_report:
+            self.feed_cache.store(result)
+        self.report_feeds()
+        print(f"Found {counts['candidates']} candidates")
+        if counts["duplicates"]:
+            print(f"Skipped {counts['duplicates']} near-duplicate stories")
+
+        # The best TOP_K that rendered, once every feed is in; spare slots cover failures
+        top = [candidate for candidate in finalists.items() if candidate.get("draft")][:finalists.k]
+        for i, candidate in enumerate(top):
+            print(f"\nProcessing {i+1}/{len(top)}: {candidate['title'][:50]}...")
+
+            try:
+                draft_path = self.save_draft(candidate["draft"], candidate["title"], candidate)
+
                 self.mark_seen(candidate["link"], processed=True)
+                self.near_dups.add(candidate["link"], candidate["signature"])
                 print(f"  ✓ Draft saved: {draft_path}")
-                
+
             except Exception as e:
                 print(f"  ! Error: {str(e)}")
                 continue
-                
+
+        self.seen_index.flush()
+        self.extractor.shutdown()
+        self.write_metrics()
+        self.write_profile()
         print("\nCompleted processing")
 
+    def rebuild_offline(self):
+        """Regenerate drafts for every cached article without touching the network."""
+        self.metrics.reset()
+        self.profiler.start()
+        urls = self.html_cache.urls()
+        print(f"Rebuilding {len(urls)} drafts from {self.html_cache.root}")
+        with self.profiler.stage("articles"), ThreadPoolExecutor(max_workers=max(1, self.extractor.workers)) as pool:
+            futures = [pool.submit(self.profiler.wrap(self.extract_readable), url, True) for url in urls]
+            for i, (url, future) in enumerate(zip(urls, futures)):
+                print(f"\nRebuilding {i+1}/{len(urls)}: {url[:70]}")
+
+                try:
+                    extracted = future.result()
+
+                    if not extracted["ok"]:
+                        print(f"  ✗ {extracted['error']}")
+                        continue
+
+                    # Without the feed entry the title falls back to the page's own
+                    draft = self.make_draft({"link": url}, extracted)
+                    draft_path = self.save_draft(draft, extracted["title"] or "untitled", {"link": url})
+                    print(f"  ✓ Draft saved: {draft_path} (extracted in {extracted['elapsed']:.2f}s)")
+
+                except Exception as e:
+                    print(f"  ! Error: {str(e)}")
+                    continue
+
+        self.extractor.shutdown()
+        self.write_metrics()
+        self.write_profile()
+        print("\nCompleted rebuild")
+
+    def run_daemon(self):
+        """Keep polling each source on its own adaptive schedule until interrupted."""
+        settings = self.config.get("DAEMON", {})
+        schedule = FeedSchedule(
+            self.db_conn,
+            min_interval=settings.get("MIN_INTERVAL", 300),
+            max_interval=settings.get("MAX_INTERVAL", 6 * 3600),
+            default_interval=settings.get("DEFAULT_INTERVAL", 1800),
+            jitter=settings.get("JITTER", 0.1),
+        )
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        print(f"Daemon started for {len(self.config['SOURCES'])} sources (Ctrl+C to stop)")
+
+        try:
+            while not stop.is_set():
+                due = schedule.due(self.config["SOURCES"])
+                if due:
+                    self.process(due)
+                    for result in self.feed_report:
+                        schedule.observe(result)
+                    # A source whose fetch raised left no result; back off rather than re-polling it at once
+                    reported = {result["source"] for result in self.feed_report}
+                    for source in due:
+                        if source not in reported:
+                            schedule.observe({"source": source, "ok": False, "not_modified": False})
+                wait = schedule.seconds_until_next(self.config["SOURCES"])
+                print(f"Next poll in {wait:.0f}s")
+                stop.wait(wait)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.seen_index.flush()
+            self.extractor.shutdown()
+        print("Daemon stopped")
+
 
 if __name__ == "__main__":
-    aggregator = ContentAggregator("config.yaml")
-    aggregator.process()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--config", default="config.yaml", help="path to config.yaml")
+    parser.add_argument("--rebuild-offline", action="store_true",
+                        help="regenerate drafts from the HTML cache without downloading")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and poll each feed on its own adaptive schedule")
+    parser.add_argument("--check", "--dry-run", action="store_true",
+                        help="only report whether the feeds have new candidates; exit status 0 if so, 1 if not")
+    parser.add_argument("--profile", action="store_true",
+                        help="write cProfile, sampled-stack and memory profiles next to the drafts")
+    args = parser.parse_args()
+
+    aggregator = ContentAggregator(args.config, read_only=args.check)
+    if args.profile and not args.check:
+        aggregator.enable_profiling()
+    if args.check:
+        raise SystemExit(0 if aggregator.check() else 1)
+    elif args.rebuild_offline:
+        aggregator.rebuild_offline()
+    elif args.daemon:
+        aggregator.run_daemon()
+    else:
+        aggregator.process()
\ No newline at end of file
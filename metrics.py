@@ -0,0 +1,213 @@
+"""
+Run metrics for the content aggregators.
+
+Pipeline stages record their latency into fixed-bucket histograms and bump
+labelled counters (bytes, HTTP statuses, retries, cache hits, per-host
+errors). At the end of a run everything is written as JSON and in the
+Prometheus text format, so a node_exporter textfile collector pointed at
+the metrics directory picks the last run up.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Upper bounds in seconds, from a cached lookup to a slow article download
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+HELP = {
+    "bytes": "Bytes downloaded per stage.",
+    "http_responses": "HTTP responses by stage and status code.",
+    "http_retries": "Request attempts retried after a failure.",
+    "cache_requests": "Cache lookups by cache and result.",
+    "host_errors": "Failed requests by host and stage.",
+    "topk_backfills": "Top-K slots refilled from the reserve, by reason.",
+}
+
+
+def escape_label(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    """Render labels as {key="value",...}, or nothing when there are none."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Histogram:
+    """Latency histogram with cumulative buckets, as Prometheus expects."""
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        """Initialize with ascending bucket upper bounds in seconds."""
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Add one sample."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> dict:
+        """Summary and bucket counts as plain data."""
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "mean_s": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max_s": round(self.max, 6),
+            "buckets": {str(bound): n for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class Metrics:
+    """Thread-safe latency histograms and labelled counters for one run."""
+
+    def __init__(self, prefix: str = "aggregator"):
+        """Initialize with the metric name prefix used in the Prometheus output."""
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop everything recorded so far and start a new run."""
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+            self.started_at = time.time()
+
+    def observe(self, stage: str, seconds: float):
+        """Record one latency sample for a stage."""
+        with self.lock:
+            self.histograms.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time the enclosed block as one sample of stage, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add amount to the counter name with the given labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add_bytes(self, stage: str, size: int):
+        """Count bytes downloaded by a stage."""
+        self.inc("bytes", size, stage=stage)
+
+    def http_status(self, stage: str, status: int):
+        """Count one HTTP response by status code."""
+        self.inc("http_responses", stage=stage, status=status)
+
+    def cache_lookup(self, cache: str, hit: bool):
+        """Count a hit or miss for one of the caches."""
+        self.inc("cache_requests", cache=cache, result="hit" if hit else "miss")
+
+    def host_error(self, stage: str, host: str):
+        """Count a failed request against its host."""
+        self.inc("host_errors", stage=stage, host=host or "unknown")
+
+    def cache_hit_rates(self) -> dict:
+        """Hit ratio per cache, from the cache_requests counter."""
+        totals = {}
+        for (name, labels), value in self.counters.items():
+            if name != "cache_requests":
+                continue
+            labels = dict(labels)
+            hits, total = totals.get(labels["cache"], (0, 0))
+            totals[labels["cache"]] = (hits + (value if labels["result"] == "hit" else 0), total + value)
+        return {cache: round(hits / total, 4) for cache, (hits, total) in totals.items() if total}
+
+    def to_dict(self) -> dict:
+        """Snapshot of the run as plain JSON-serialisable data."""
+        with self.lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            return {
+                "started_at": self.started_at,
+                "finished_at": time.time(),
+                "stages": {stage: hist.to_dict() for stage, hist in sorted(self.histograms.items())},
+                "counters": counters,
+                "cache_hit_rates": self.cache_hit_rates(),
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the run in the Prometheus text exposition format."""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_stage_seconds Latency of pipeline stages.",
+            f"# TYPE {p}_stage_seconds histogram",
+        ]
+        with self.lock:
+            for stage, hist in sorted(self.histograms.items()):
+                for bound, n in zip(hist.buckets, hist.counts):
+                    lines.append(f"{p}_stage_seconds_bucket{format_labels({'stage': stage, 'le': bound})} {n}")
+                lines.append(f"{p}_stage_seconds_bucket{format_labels({'stage': stage, 'le': '+Inf'})} {hist.count}")
+                lines.append(f"{p}_stage_seconds_sum{format_labels({'stage': stage})} {hist.sum:.6f}")
+                lines.append(f"{p}_stage_seconds_count{format_labels({'stage': stage})} {hist.count}")
+
+            by_name = {}
+            for (name, labels), value in self.counters.items():
+                by_name.setdefault(name, []).append((dict(labels), value))
+            for name, samples in sorted(by_name.items()):
+                lines.append(f"# HELP {p}_{name}_total {HELP.get(name, name)}")
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                for labels, value in sorted(samples, key=lambda sample: sorted(sample[0].items())):
+                    lines.append(f"{p}_{name}_total{format_labels(labels)} {value}")
+
+            rates = self.cache_hit_rates()
+            started_at = self.started_at
+        if rates:
+            lines.append(f"# HELP {p}_cache_hit_ratio Share of cache lookups that hit in the last run.")
+            lines.append(f"# TYPE {p}_cache_hit_ratio gauge")
+            for cache, rate in sorted(rates.items()):
+                lines.append(f"{p}_cache_hit_ratio{format_labels({'cache': cache})} {rate:g}")
+        lines += [
+            f"# HELP {p}_last_run_duration_seconds Wall-clock time of the last run.",
+            f"# TYPE {p}_last_run_duration_seconds gauge",
+            f"{p}_last_run_duration_seconds {time.time() - started_at:.3f}",
+            f"# HELP {p}_last_run_timestamp_seconds When the last run finished.",
+            f"# TYPE {p}_last_run_timestamp_seconds gauge",
+            f"{p}_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str) -> tuple:
+        """Write metrics.json and <prefix>.prom into directory, each replaced atomically.
+
+        The textfile collector may read the directory at any moment, so a
+        half-written .prom file must never be visible.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        json_path = directory / "metrics.json"
+        prom_path = directory / f"{self.prefix}.prom"
+        for path, text in ((json_path, json.dumps(self.to_dict(), indent=2) + "\n"),
+                           (prom_path, self.to_prometheus())):
+            fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_name, path)
+            except BaseException:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+        return json_path, prom_path
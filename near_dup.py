@@ -0,0 +1,186 @@
+"""
+Near-duplicate story detection for feed candidates.
+
+The same story is syndicated under different URLs, so candidates are compared
+by content: word shingles of title and summary are hashed into MinHash
+signatures and bucketed with LSH bands. Stories already drafted are kept in
+state.db, so a syndicated copy is skipped in later runs as well, and within a
+run only the best-scoring candidate of each cluster goes on to extraction.
+"""
+
+import hashlib
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# a * x stays below 2**62 for a, x < 2**31 - 1, so the permutations never overflow uint64
+MERSENNE_PRIME = (1 << 31) - 1
+TAG = re.compile(r"<[^>]+>")
+WORD = re.compile(r"\w+")
+
+
+class NearDupIndex:
+    """MinHash/LSH index of drafted stories backed by state.db."""
+
+    def __init__(self, conn: sqlite3.Connection, num_perm: int = 64, bands: int = 16,
+                 threshold: float = 0.5, shingle_size: int = 3, max_age_days: int = 14):
+        """Create the tables and prune stories older than max_age_days."""
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.conn = conn
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        # Fixed seed so signatures stored in state.db stay comparable across runs
+        rng = np.random.RandomState(1)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS near_dup (
+                url TEXT PRIMARY KEY,
+                signature BLOB,
+                added_at TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS near_dup_bands (
+                bucket TEXT,
+                url TEXT,
+                PRIMARY KEY (bucket, url)
+            )
+        """)
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM near_dup_bands WHERE url IN (SELECT url FROM near_dup WHERE added_at < ?)", (cutoff,)
+            )
+            self.conn.execute("DELETE FROM near_dup WHERE added_at < ?", (cutoff,))
+
+    def shingles(self, text: str) -> set:
+        """Word n-grams of the tag-stripped, lowercased text."""
+        words = WORD.findall(TAG.sub(" ", text).lower())
+        if len(words) < self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the text's shingles."""
+        shingles = self.shingles(text)
+        if not shingles:
+            # Real MinHash values are always below the prime, so this marks "no shingles"
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingles),
+            dtype=np.uint64, count=len(shingles),
+        )
+        prime = np.uint64(MERSENNE_PRIME)
+        permuted = (np.outer(hashes % prime, self.a) + self.b) % prime
+        return permuted.min(axis=0)
+
+    def buckets(self, signature: np.ndarray) -> list:
+        """LSH bucket key for each band."""
+        # The band number is part of the key so all bands can be looked up with one IN query
+        return [
+            f"{band}:" + hashlib.blake2b(
+                signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8
+            ).hexdigest()
+            for band in range(self.bands)
+        ]
+
+    def best_match(self, signature: np.ndarray, others: list, signatures: list):
+        """Return the first of others whose signature estimates Jaccard >= threshold."""
+        if not others:
+            return None
+        similarity = np.count_nonzero(np.vstack(signatures) == signature, axis=1) / self.num_perm
+        hits = np.flatnonzero(similarity >= self.threshold)
+        return others[hits[0]] if len(hits) else None
+
+    def find(self, signature: np.ndarray, buckets: list = None) -> str:
+        """Return the URL of a stored story similar to signature, if any."""
+        buckets = buckets or self.buckets(signature)
+        placeholders = ",".join("?" * len(buckets))
+        rows = self.conn.execute(
+            "SELECT DISTINCT d.url, d.signature FROM near_dup_bands b JOIN near_dup d ON d.url = b.url "
+            f"WHERE b.bucket IN ({placeholders})", buckets
+        ).fetchall()
+        return self.best_match(
+            signature, [url for url, _ in rows], [np.frombuffer(stored, dtype=np.uint64) for _, stored in rows]
+        )
+
+    def add(self, url: str, signature: np.ndarray):
+        """Remember a drafted story."""
+        if signature[0] == MERSENNE_PRIME:
+            return
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO near_dup(url, signature, added_at) VALUES(?, ?, ?)",
+                (url, signature.tobytes(), datetime.now(timezone.utc).isoformat())
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO near_dup_bands(bucket, url) VALUES(?, ?)",
+                [(bucket, url) for bucket in self.buckets(signature)]
+            )
+
+
+class RunClusters:
+    """Cluster representatives of one run, for candidates arriving in any order.
+
+    A candidate that duplicates the current representative of its cluster
+    with a higher score takes its place, so the best-scoring copy wins no
+    matter which one arrives first.
+    """
+
+    def __init__(self, index: NearDupIndex):
+        """Initialize with the index that holds stored stories and the LSH settings."""
+        self.index = index
+        self.representatives = {}
+        self.slot_buckets = {}
+        self.run_buckets = {}
+        self.slots = 0
+
+    def offer(self, candidate: dict) -> tuple:
+        """Return (accepted, replaced): whether candidate now represents its cluster, and whom it displaced.
+
+        Candidates get a "signature"; rejected and displaced ones get "duplicate_of".
+        """
+        if candidate.get("signature") is None:
+            candidate["signature"] = self.index.signature(
+                f"{candidate.get('title', '')}\n\n{candidate.get('summary', '')}"
+            )
+        signature = candidate["signature"]
+        if signature[0] == MERSENNE_PRIME:
+            # No words to compare on; never treat it as a duplicate
+            return True, None
+        buckets = self.index.buckets(signature)
+
+        # Representatives chosen earlier in this run share at least one band bucket
+        others = list(dict.fromkeys(slot for bucket in buckets for slot in self.run_buckets.get(bucket, ())))
+        match = self.index.best_match(signature, others, [self.representatives[slot]["signature"] for slot in others])
+        if match is not None and candidate.get("score", 0) <= self.representatives[match].get("score", 0):
+            candidate["duplicate_of"] = self.representatives[match]["link"]
+            return False, None
+
+        stored = self.index.find(signature, buckets)
+        if stored:
+            candidate["duplicate_of"] = stored
+            return False, None
+
+        replaced = None
+        if match is not None:
+            replaced = self.representatives.pop(match)
+            replaced["duplicate_of"] = candidate["link"]
+            for bucket in self.slot_buckets.pop(match):
+                self.run_buckets[bucket].remove(match)
+        slot = self.slots
+        self.slots += 1
+        self.representatives[slot] = candidate
+        self.slot_buckets[slot] = buckets
+        for bucket in buckets:
+            self.run_buckets.setdefault(bucket, []).append(slot)
+        return True, replaced
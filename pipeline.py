@@ -0,0 +1,255 @@
+"""
+Streaming stage pipeline for aggregator runs.
+
+A run is a chain of stages joined by bounded queues: feed fetch -> parse ->
+dedup -> score -> select -> extract -> render, with the caller writing what
+comes out. Every stage has its own worker threads, so articles from the
+first feeds are being extracted while slower feeds are still downloading.
+A full queue makes the stages before it wait (backpressure) instead of
+holding every candidate in memory.
+
+Stages with workers=0 run on the thread that iterates Pipeline.run(). That
+is where anything touching state.db goes, as the connection belongs to that
+thread; such stages also never need locks for their own state.
+"""
+
+import itertools
+import queue
+import threading
+from collections import deque
+from contextlib import nullcontext
+
+# How long a blocked worker waits before checking whether the run was stopped
+POLL_SECONDS = 0.05
+
+
+class Stopped(Exception):
+    """Raised inside workers to unwind once the pipeline is stopped."""
+
+
+class Done:
+    """End-of-stream marker; sorts after every item in a priority queue."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+DONE = Done()
+
+
+class Stage:
+    """One step of a pipeline: fn(item) returns an iterable of zero or more outputs."""
+
+    def __init__(self, name: str, fn, workers: int = 1, queue_size: int = 64, priority=None):
+        """Initialize with a worker count (0 runs on the iterating thread) and input queue size.
+
+        priority, if given, maps an input item to a sort key; the stage then
+        takes the lowest key waiting instead of the oldest item.
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(0, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.priority = priority
+
+
+class PriorityInbox:
+    """queue.Queue interface over a PriorityQueue ordered by a stage's priority key."""
+
+    def __init__(self, maxsize: int, key):
+        """Initialize with the bound and the key function."""
+        self.queue = queue.PriorityQueue(maxsize)
+        self.key = key
+        self.sequence = itertools.count()
+
+    def wrap(self, item):
+        # The sequence number keeps equal keys first-in, first-out
+        key = DONE if item is DONE else self.key(item)
+        return key, next(self.sequence), item
+
+    def put(self, item, timeout=None):
+        self.queue.put(self.wrap(item), timeout=timeout)
+
+    def put_nowait(self, item):
+        self.queue.put_nowait(self.wrap(item))
+
+    def get(self, timeout=None):
+        return self.queue.get(timeout=timeout)[2]
+
+    def get_nowait(self):
+        return self.queue.get_nowait()[2]
+
+
+class Pipeline:
+    """Run items through stages concurrently and yield what the last stage emits."""
+
+    def __init__(self, stages: list, stop_event: threading.Event = None, profiler=None):
+        """Initialize with the stages in order; setting stop_event ends the run early.
+
+        Given a profiling.Profiler, every item a stage handles is measured
+        with profiler.step(stage name).
+        """
+        self.stages = stages
+        self.stop_event = stop_event
+        self.profiler = profiler
+        self.halt = threading.Event()
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+        self.errors = []
+
+    def stop(self):
+        """Ask every stage to finish; run() returns without waiting for the rest of the input."""
+        self.halt.set()
+        self.wakeup.set()
+
+    def stopped(self) -> bool:
+        """Whether stop() was called or the caller's stop_event is set."""
+        return self.halt.is_set() or (self.stop_event is not None and self.stop_event.is_set())
+
+    def receivers(self, index: int) -> int:
+        """How many consumers read queue index (the input of stage index)."""
+        if index == len(self.stages) or self.stages[index].workers == 0:
+            return 1
+        return self.stages[index].workers
+
+    def apply(self, stage: Stage, item) -> list:
+        """Run one item through a stage, recording rather than raising its errors."""
+        step = self.profiler.step(stage.name) if self.profiler is not None else nullcontext()
+        try:
+            with step:
+                return list(stage.fn(item) or ())
+        except Exception as e:
+            with self.lock:
+                self.errors.append((stage.name, e))
+            return []
+
+    def put(self, q, item):
+        """Blocking put that gives up once the pipeline is stopped."""
+        while True:
+            if self.stopped():
+                raise Stopped
+            try:
+                q.put(item, timeout=POLL_SECONDS)
+                self.wakeup.set()
+                return
+            except queue.Full:
+                continue
+
+    def get(self, q):
+        """Blocking get that gives up once the pipeline is stopped."""
+        while True:
+            if self.stopped():
+                raise Stopped
+            try:
+                item = q.get(timeout=POLL_SECONDS)
+                # A slot just freed up; the iterating thread may be waiting to put
+                self.wakeup.set()
+                return item
+            except queue.Empty:
+                continue
+
+    def work(self, index: int, queues: list, remaining: list):
+        """Worker thread loop for stage index."""
+        stage = self.stages[index]
+        try:
+            while True:
+                item = self.get(queues[index])
+                if item is DONE:
+                    break
+                for output in self.apply(stage, item):
+                    self.put(queues[index + 1], output)
+            with self.lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            # The last worker out tells every consumer of the next queue
+            if last:
+                for _ in range(self.receivers(index + 1)):
+                    self.put(queues[index + 1], DONE)
+        except Stopped:
+            pass
+
+    def run(self, items):
+        """Feed items to the first stage and yield the last stage's outputs as they arrive.
+
+        Stages with workers=0, and pulling from items, happen on the calling
+        thread between yields. Closing the generator early stops the run.
+        """
+        count = len(self.stages)
+        queues = []
+        for stage in self.stages:
+            if stage.priority is not None:
+                queues.append(PriorityInbox(stage.queue_size, stage.priority))
+            else:
+                queues.append(queue.Queue(stage.queue_size))
+        queues.append(queue.Queue(self.stages[-1].queue_size if self.stages else 1))
+        remaining = [stage.workers for stage in self.stages]
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self.work, args=(index, queues, remaining), name=f"{stage.name}_{n}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        # Outputs of the calling thread's own steps wait here until their queue has room
+        source = iter(items)
+        outboxes = {index: deque() for index, stage in enumerate(self.stages) if stage.workers == 0}
+        outboxes[-1] = deque()
+        inline_done = set()
+        try:
+            while not self.stopped():
+                self.wakeup.clear()
+                progressed = False
+
+                for index, outbox in outboxes.items():
+                    while outbox:
+                        try:
+                            queues[index + 1].put_nowait(outbox[0])
+                        except queue.Full:
+                            break
+                        outbox.popleft()
+                        progressed = True
+
+                if source is not None and not outboxes[-1]:
+                    try:
+                        outboxes[-1].append(next(source))
+                    except StopIteration:
+                        outboxes[-1].extend([DONE] * self.receivers(0))
+                        source = None
+                    progressed = True
+
+                for index in outboxes:
+                    if index < 0 or index in inline_done or outboxes[index]:
+                        continue
+                    try:
+                        item = queues[index].get_nowait()
+                    except queue.Empty:
+                        continue
+                    progressed = True
+                    if item is DONE:
+                        inline_done.add(index)
+                        outboxes[index].extend([DONE] * self.receivers(index + 1))
+                    else:
+                        outboxes[index].extend(self.apply(self.stages[index], item))
+
+                try:
+                    item = queues[count].get_nowait()
+                except queue.Empty:
+                    pass
+                else:
+                    if item is DONE:
+                        return
+                    yield item
+                    continue
+
+                if not progressed:
+                    self.wakeup.wait(POLL_SECONDS)
+        finally:
+            self.halt.set()
+            for thread in threads:
+                thread.join()
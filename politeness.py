@@ -0,0 +1,80 @@
+"""
+Per-host politeness scheduling for article and image downloads.
+
+Each host gets its own token bucket, so requests to the same site are spaced
+by a minimum interval while requests to different sites go out in parallel.
+Hosts that answer 429/503 are paused for their Retry-After period.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class HostScheduler:
+    """Thread-safe token bucket per host."""
+
+    def __init__(self, min_interval: float = 1.0, burst: int = 1, jitter: float = 0.0):
+        """Initialize with the per-host interval, bucket size and random jitter."""
+        self.min_interval = max(0.0, float(min_interval))
+        self.burst = max(1, int(burst))
+        self.jitter = max(0.0, float(jitter))
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def _bucket(self, host: str, now: float) -> dict:
+        """Return the bucket for host, refilled up to now."""
+        bucket = self.buckets.setdefault(host, {"tokens": float(self.burst), "updated": now, "blocked_until": 0.0})
+        if self.min_interval > 0:
+            refill = (now - bucket["updated"]) / self.min_interval
+            bucket["tokens"] = min(float(self.burst), bucket["tokens"] + refill)
+        else:
+            bucket["tokens"] = float(self.burst)
+        bucket["updated"] = now
+        return bucket
+
+    def acquire(self, host: str) -> float:
+        """Block until a request to host is allowed; return the time waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                bucket = self._bucket(host, now)
+                if now >= bucket["blocked_until"] and bucket["tokens"] >= 1.0:
+                    bucket["tokens"] -= 1.0
+                    break
+                wait = max(
+                    bucket["blocked_until"] - now,
+                    (1.0 - bucket["tokens"]) * self.min_interval,
+                )
+            wait += random.uniform(0.0, self.jitter)
+            time.sleep(wait)
+            waited += wait
+        return waited
+
+    def defer(self, host: str, seconds: float):
+        """Pause all requests to host for the given number of seconds."""
+        with self.lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            bucket["blocked_until"] = max(bucket["blocked_until"], now + max(0.0, seconds))
+
+    @staticmethod
+    def retry_after(headers, default: float = 0.0) -> float:
+        """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+        value = (headers or {}).get("Retry-After")
+        if not value:
+            return default
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return default
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
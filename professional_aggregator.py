@@ -1,9 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox, Menu
 import threading
+import queue
 import webbrowser
 import sqlite3
-import hashlib
 import math
 import os
 import random
@@ -11,24 +11,48 @@ import re
 import textwrap
 import time
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import base64
 from datetime import datetime, timezone
+from functools import cached_property
 from pathlib import Path
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 import shutil
 
-import feedparser
-import frontmatter
 import requests
 import yaml
-from bs4 import BeautifulSoup
-from dateutil import parser as dateparser
-from markdownify import markdownify as md
-from readability import Document
+
+from drafts_catalog import DraftCatalog
+from extraction import ExtractionPool, header_charset
+from feed_fetcher import FeedCache, FeedFetcher
+from html_cache import HtmlCache
+from http_body import read_capped
+from image_fetcher import ImageFetcher
+from keyword_matcher import keyword_matcher
+from metrics import Metrics
+from pipeline import Pipeline, Stage
+from politeness import HostScheduler
+from profiling import Profiler
+from seen_index import SeenIndex
+from topk import StreamingTopK
+
+# The log view keeps this many lines; older ones are dropped
+LOG_MAX_LINES = 2000
+# How often the Tk main loop drains messages from worker threads
+UI_POLL_MS = 100
+# Upper bound on messages applied per drain, so one tick never freezes the UI
+UI_BATCH = 1000
+# The Results tab shows the drafts catalogue in state.db a page at a time
+DB_PATH = "state.db"
+DRAFTS_PAGE_SIZE = 100
+# Search runs once typing pauses for this long
+SEARCH_DELAY_MS = 250
 
 class ProfessionalContentAggregator:
     def __init__(self, root):
         self.root = root
+        # Worker threads never touch widgets; they post here and the main loop applies it
+        self.ui_queue = queue.Queue()
         self.root.title("AI Content Pro - Professional Content Aggregator")
         self.root.geometry("1000x700")
         self.root.minsize(900, 600)
@@ -38,6 +62,14 @@ class ProfessionalContentAggregator:
         self.setup_gui()
         self.load_config()
         self.stop_event = threading.Event()
+        # Main-thread connection for the Results tab; runs open their own in the worker
+        self.drafts = DraftCatalog(sqlite3.connect(DB_PATH))
+        self.drafts_page = 0
+        self.search_job = None
+        if not self.drafts.count():
+            self.drafts.import_dir(self.out_dir_var.get())
+        self.update_drafts_list()
+        self.root.after(UI_POLL_MS, self.process_ui_queue)
         
     def setup_styles(self):
         self.style = ttk.Style()
@@ -54,8 +86,16 @@ class ProfessionalContentAggregator:
         file_menu.add_command(label="Load Configuration", command=self.load_config_dialog)
         file_menu.add_command(label="Save Configuration", command=self.save_config_dialog)
         file_menu.add_separator()
+        file_menu.add_command(label="Rebuild Drafts from Cache", command=self.start_rebuild)
+        file_menu.add_command(label="Reindex Drafts Folder", command=self.reindex_drafts)
+        file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         
+        tools_menu = Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        self.profile_var = tk.BooleanVar(value=False)
+        tools_menu.add_checkbutton(label="Profile Runs", variable=self.profile_var)
+        
         help_menu = Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Help", menu=help_menu)
         help_menu.add_command(label="About", command=self.show_about)
@@ -174,18 +214,41 @@ class ProfessionalContentAggregator:
         
         ttk.Label(results_frame, text="Generated Drafts:", font=('Helvetica', 10, 'bold')).grid(row=0, column=0, columnspan=3, sticky=tk.W, pady=(0, 10))
         
+        search_frame = ttk.Frame(results_frame)
+        search_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=50)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        search_entry.bind("<KeyRelease>", self.schedule_search)
+        
         list_frame = ttk.Frame(results_frame)
-        list_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        list_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         
-        self.drafts_listbox = tk.Listbox(list_frame, width=80, height=15, font=('Helvetica', 10))
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.drafts_listbox.yview)
-        self.drafts_listbox.configure(yscrollcommand=scrollbar.set)
+        # Only the current page is ever inserted, however many drafts exist
+        self.drafts_tree = ttk.Treeview(list_frame, columns=("title", "source", "score", "created", "path"),
+                                        displaycolumns=("title", "source", "score", "created"),
+                                        show="headings", height=15)
+        for column, heading, width in (("title", "Title", 420), ("source", "Source", 150),
+                                       ("score", "Score", 60), ("created", "Created", 130)):
+            self.drafts_tree.heading(column, text=heading)
+            self.drafts_tree.column(column, width=width, stretch=(column == "title"))
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.drafts_tree.yview)
+        self.drafts_tree.configure(yscrollcommand=scrollbar.set)
+        self.drafts_tree.bind("<Double-1>", lambda event: self.open_draft())
         
-        self.drafts_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.drafts_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        page_frame = ttk.Frame(results_frame)
+        page_frame.grid(row=3, column=0, columnspan=3, pady=5)
+        ttk.Button(page_frame, text="< Prev", command=self.prev_page, width=10).pack(side=tk.LEFT, padx=5)
+        self.page_var = tk.StringVar()
+        ttk.Label(page_frame, textvariable=self.page_var).pack(side=tk.LEFT, padx=10)
+        ttk.Button(page_frame, text="Next >", command=self.next_page, width=10).pack(side=tk.LEFT, padx=5)
+        
         btn_frame = ttk.Frame(results_frame)
-        btn_frame.grid(row=2, column=0, columnspan=3, pady=15)
+        btn_frame.grid(row=4, column=0, columnspan=3, pady=15)
         
         ttk.Button(btn_frame, text="Open Draft", command=self.open_draft, width=15).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Open Folder", command=self.open_folder, width=15).pack(side=tk.LEFT, padx=5)
@@ -193,7 +256,7 @@ class ProfessionalContentAggregator:
         ttk.Button(btn_frame, text="Refresh", command=self.update_drafts_list, width=15).pack(side=tk.LEFT, padx=5)
         
         results_frame.columnconfigure(0, weight=1)
-        results_frame.rowconfigure(1, weight=1)
+        results_frame.rowconfigure(2, weight=1)
         
     def browse_directory(self):
         directory = filedialog.askdirectory()
@@ -206,30 +269,94 @@ class ProfessionalContentAggregator:
             self.images_dir_var.set(directory)
             
     def log_message(self, message):
-        self.log_text.config(state=tk.NORMAL)
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert("1.0", f"[{timestamp}] {message}\n")
-        self.log_text.config(state=tk.DISABLED)
-        self.status_var.set(message)
-        self.root.update_idletasks()
+        self.ui_queue.put(("log", (f"[{timestamp}] {message}\n", message)))
         
     def update_progress(self, value):
-        self.progress['value'] = value
-        self.root.update_idletasks()
+        self.ui_queue.put(("progress", value))
+
+    def call_in_ui(self, fn, *args):
+        self.ui_queue.put(("call", (fn, args)))
+
+    def process_ui_queue(self):
+        lines, status, progress, calls = [], None, None, []
+        backlog = True
+        for _ in range(UI_BATCH):
+            try:
+                kind, value = self.ui_queue.get_nowait()
+            except queue.Empty:
+                backlog = False
+                break
+            if kind == "log":
+                lines.append(value[0])
+                status = value[1]
+            elif kind == "progress":
+                progress = value
+            else:
+                calls.append(value)
+
+        if lines:
+            # Newest first, as one insert per tick instead of one per message
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.insert("1.0", "".join(reversed(lines)))
+            self.log_text.delete(f"{LOG_MAX_LINES + 1}.0", tk.END)
+            self.log_text.config(state=tk.DISABLED)
+            self.status_var.set(status)
+        if progress is not None:
+            self.progress['value'] = progress
+        for fn, args in calls:
+            fn(*args)
+
+        self.root.after(1 if backlog else UI_POLL_MS, self.process_ui_queue)
+
+    def set_running(self, running):
+        self.start_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.stop_btn.config(state=tk.NORMAL if running else tk.DISABLED)
         
     def update_drafts_list(self):
-        drafts_dir = Path(self.out_dir_var.get())
-        if drafts_dir.exists():
-            draft_files = []
-            for f in drafts_dir.glob('*.md'):
-                draft_files.append((f.stat().st_mtime, f.name))
+        query = self.search_var.get()
+        total = self.drafts.count(query)
+        pages = max(1, math.ceil(total / DRAFTS_PAGE_SIZE))
+        self.drafts_page = min(self.drafts_page, pages - 1)
+        rows = self.drafts.page(query, self.drafts_page * DRAFTS_PAGE_SIZE, DRAFTS_PAGE_SIZE)
         
-        
-        draft_files.sort(reverse=True, key=lambda x: x[0])
-        
-        self.drafts_listbox.delete(0, tk.END)
-        for mtime, filename in draft_files:
-            self.drafts_listbox.insert(tk.END, filename)
+        self.drafts_tree.delete(*self.drafts_tree.get_children())
+        for row in rows:
+            score = f"{row['score']:.2f}" if row["score"] is not None else ""
+            created = (row["created_at"] or "")[:16].replace("T", " ")
+            self.drafts_tree.insert("", tk.END, values=(row["title"], row["source"] or "", score, created, row["file_path"]))
+        self.page_var.set(f"Page {self.drafts_page + 1} of {pages} ({total} drafts)")
+
+    def schedule_search(self, event=None):
+        if self.search_job:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DELAY_MS, self.search_drafts)
+
+    def search_drafts(self):
+        self.search_job = None
+        self.drafts_page = 0
+        self.update_drafts_list()
+
+    def prev_page(self):
+        if self.drafts_page > 0:
+            self.drafts_page -= 1
+            self.update_drafts_list()
+
+    def next_page(self):
+        self.drafts_page += 1
+        self.update_drafts_list()
+
+    def reindex_drafts(self):
+        removed = self.drafts.prune_missing()
+        added = self.drafts.import_dir(self.out_dir_var.get())
+        self.log_message(f"Drafts catalogue reindexed: {added} added, {removed} removed")
+        self.update_drafts_list()
+
+    def selected_draft(self):
+        selection = self.drafts_tree.selection()
+        if selection:
+            return Path(self.drafts_tree.set(selection[0], "path"))
+        return None
                 
     def get_config_from_gui(self):
         return {
@@ -246,13 +373,35 @@ class ProfessionalContentAggregator:
                 "TIMEOUT": 30,
                 "THROTTLE_DELAY": 3.0,
                 "RETRY_ATTEMPTS": 3,
+                "ASYNC_FEEDS": True,
+                "FEED_CONCURRENCY": 16,
+                "FEED_PER_HOST": 2,
+                "HOST_MIN_INTERVAL": 3.0,
+                "HOST_JITTER": 0.5,
+                "ARTICLE_WORKERS": 8,
             },
             "OUTPUT": {
                 "TOP_K": int(self.top_k_var.get()),
                 "OUT_DIR": self.out_dir_var.get(),
                 "IMAGES_DIR": self.images_dir_var.get(),
                 "MAX_IMAGES": int(self.max_images_var.get()),
-                "DB_PATH": "state.db",
+                "DB_PATH": DB_PATH,
+                "MAX_IMAGE_MB": 5,
+                "IMAGE_TARGET_WIDTH": 800,
+                "IMAGE_WORKERS": 4,
+                "CACHE_DIR": "cache",
+                "CACHE_MAX_MB": 256,
+                "METRICS_DIR": "metrics",
+            },
+            "PROCESSING": {
+                "EXTRACT_WORKERS": os.cpu_count() or 1,
+                "SUMMARIZER": "heuristic",
+                "NEAR_DUP_THRESHOLD": 0.5,
+                "NEAR_DUP_DAYS": 14,
+                "PARSE_WORKERS": 2,
+                "SCORE_WORKERS": 2,
+                "QUEUE_SIZE": 64,
+                "SPECULATIVE_EXTRACTIONS": 2,
             },
         }
         
@@ -325,10 +474,8 @@ from multiple RSS feeds into publish-ready drafts.
         messagebox.showinfo("About AI Content Pro", about_text)
         
     def open_draft(self):
-        selection = self.drafts_listbox.curselection()
-        if selection:
-            draft_name = self.drafts_listbox.get(selection[0])
-            draft_path = Path(self.out_dir_var.get()) / draft_name
+        draft_path = self.selected_draft()
+        if draft_path:
             try:
                 os.system(f"xdg-open '{draft_path}'")
             except:
@@ -348,12 +495,9 @@ from multiple RSS feeds into publish-ready drafts.
                 os.startfile(str(drafts_dir))
 
     def open_with_menu(self):
-        selection = self.drafts_listbox.curselection()
-        if not selection:
+        draft_path = self.selected_draft()
+        if not draft_path:
             return
-            
-        draft_name = self.drafts_listbox.get(selection[0])
-        draft_path = Path(self.out_dir_var.get()) / draft_name
         
         menu = Menu(self.root, tearoff=0)
         menu.add_command(label="VS Code", command=lambda: self.open_with_app(draft_path, "code"))
@@ -387,89 +531,215 @@ from multiple RSS feeds into publish-ready drafts.
                 self.log_message(f"Error opening with custom application: {e}")
 
     def start_aggregation(self):
-        self.start_btn.config(state=tk.DISABLED)
-        self.stop_btn.config(state=tk.NORMAL)
+        self.set_running(True)
         self.stop_event.clear()
-        threading.Thread(target=self.run_aggregation, daemon=True).start()
+        # Tk variables are read here, on the main thread, and handed to the worker
+        args = (self.get_config_from_gui(), self.profile_var.get())
+        threading.Thread(target=self.run_aggregation, args=args, daemon=True).start()
         
+    def start_rebuild(self):
+        self.start_btn.config(state=tk.DISABLED)
+        args = (self.get_config_from_gui(), self.profile_var.get())
+        threading.Thread(target=self.run_rebuild, args=args, daemon=True).start()
+
+    def run_rebuild(self, config, profile=False):
+        try:
+            aggregator = ContentAggregator(config)
+            if profile:
+                aggregator.enable_profiling()
+            aggregator.profiler.start()
+            urls = aggregator.html_cache.urls()
+            self.log_message(f"Rebuilding {len(urls)} drafts from {aggregator.html_cache.root}")
+
+            with aggregator.profiler.stage("articles"), ThreadPoolExecutor(max_workers=max(1, aggregator.extractor.workers)) as pool:
+                futures = [pool.submit(aggregator.profiler.wrap(aggregator.extract_readable), url, True) for url in urls]
+                for i, (url, future) in enumerate(zip(urls, futures)):
+                    self.update_progress((i / len(urls)) * 100)
+                    extracted = future.result()
+                    if not extracted["ok"]:
+                        self.log_message(f"  ✗ {url[:60]}: {extracted['error']}")
+                        continue
+
+                    draft = aggregator.make_draft({"link": url}, extracted)
+                    draft_path = aggregator.save_draft(draft, extracted["title"] or "untitled", {"link": url})
+                    self.log_message(f"  ✓ Draft saved: {draft_path} (extracted in {extracted['elapsed']:.2f}s)")
+            aggregator.extractor.shutdown()
+            aggregator.image_fetcher.shutdown()
+            self.write_metrics(aggregator)
+            self.write_profile(aggregator)
+
+            self.log_message("Rebuild completed")
+            self.update_progress(100)
+            self.call_in_ui(self.update_drafts_list)
+        except Exception as e:
+            self.log_message(f"Fatal error: {str(e)}")
+        self.call_in_ui(self.start_btn.config, {"state": tk.NORMAL})
+
+    def write_metrics(self, aggregator):
+        try:
+            json_path, prom_path = aggregator.metrics.write(aggregator.config["OUTPUT"].get("METRICS_DIR", "metrics"))
+            self.log_message(f"Metrics written to {json_path} and {prom_path}")
+        except OSError as e:
+            self.log_message(f"Could not write metrics: {e}")
+
+    def write_profile(self, aggregator):
+        aggregator.profiler.stop()
+        try:
+            for path in aggregator.profiler.write(aggregator.config["OUTPUT"]["OUT_DIR"]):
+                self.log_message(f"Profile written to {path}")
+        except OSError as e:
+            self.log_message(f"Could not write profile: {e}")
+
     def stop_aggregation(self):
         self.stop_event.set()
-        self.start_btn.config(state=tk.NORMAL)
-        self.stop_btn.config(state=tk.DISABLED)
+        self.set_running(False)
         self.log_message("Aggregation stopped by user")
         
-    def run_aggregation(self):
+    def run_aggregation(self, config, profile=False):
         try:
-            config = self.get_config_from_gui()
             aggregator = ContentAggregator(config)
+            if profile:
+                aggregator.enable_profiling()
+            aggregator.profiler.start()
             
             self.log_message(f"Starting aggregation for: {config['NICHE']}")
             
-            candidates = aggregator.fetch_candidates()
-            self.log_message(f"Found {len(candidates)} candidates")
-            
-            scored = []
-            for candidate in candidates:
-                if self.stop_event.is_set():
-                    return
-                    
-                if aggregator.is_seen(candidate["link"]):
-                    continue
-                    
-                try:
-                    candidate["score"] = aggregator.rank_item(candidate["entry"])
-                    if candidate["score"] > 0.5:
-                        scored.append(candidate)
-                except Exception:
-                    continue
-                    
-            scored.sort(key=lambda x: x["score"], reverse=True)
-            top_k = min(config["OUTPUT"]["TOP_K"], len(scored))
-            
-            for i, candidate in enumerate(scored[:top_k]):
-                if self.stop_event.is_set():
-                    return
-                    
-                self.log_message(f"Processing {i+1}/{top_k}: {candidate['title'][:50]}...")
-                self.update_progress((i / top_k) * 100)
-                
-                try:
-                    time.sleep(random.uniform(1.0, config["REQUEST_SETTINGS"]["THROTTLE_DELAY"]))
-                    extracted = aggregator.extract_readable(candidate["link"])
-                    
-                    if not extracted["ok"]:
-                        self.log_message(f"  ✗ {extracted['error']}")
+            top_k = config["OUTPUT"]["TOP_K"]
+            finalists = StreamingTopK(
+                top_k,
+                key=lambda candidate: candidate["score"],
+                spare=config.get("PROCESSING", {}).get("SPECULATIVE_EXTRACTIONS", 2),
+            )
+            counts = {"candidates": 0, "duplicates": 0}
+            pipeline = aggregator.build_pipeline(
+                aggregator.feed_cache.load(config["SOURCES"]), finalists, counts, self.stop_event
+            )
+
+            # Articles from the first feeds are extracted while later feeds are still downloading
+            with aggregator.profiler.stage("pipeline"):
+                for candidate in pipeline.run(config["SOURCES"]):
+                    extracted = candidate.get("extracted")
+                    if extracted is None:
                         continue
-                        
-                    draft = aggregator.make_draft(candidate, extracted)
-                    draft_path = aggregator.save_draft(draft, candidate["title"])
-                    
+                    if not extracted["ok"]:
+                        self.log_message(f"  ✗ {candidate['title'][:50]}: {extracted['error']}")
+                    elif candidate.get("draft"):
+                        # Only the rendered draft is kept until the run ends
+                        del candidate["extracted"]
+                        self.log_message(f"  · {candidate['title'][:50]} (extracted in {extracted['elapsed']:.2f}s)")
+                    ready = min(top_k, sum(1 for finalist in finalists.items() if finalist.get("draft")))
+                    self.update_progress(ready / max(1, top_k) * 100)
+            if self.stop_event.is_set():
+                aggregator.seen_index.flush()
+                aggregator.extractor.shutdown()
+                aggregator.image_fetcher.shutdown()
+                self.write_metrics(aggregator)
+                self.write_profile(aggregator)
+                return
+            for stage, error in pipeline.errors:
+                self.log_message(f"  ! Error in {stage}: {error}")
+            for result in aggregator.feed_report:
+                aggregator.feed_cache.store(result)
+                if result["ok"] and result["not_modified"]:
+                    self.log_message(f"  = {result['source']} (unchanged, {result['elapsed']:.2f}s)")
+                elif result["ok"]:
+                    self.log_message(f"  ✓ {result['source']} ({result.get('entries', 0)} entries, {result['elapsed']:.2f}s)")
+                else:
+                    self.log_message(f"  ✗ {result['source']} ({result['elapsed']:.2f}s): {result['error']}")
+            self.log_message(f"Found {counts['candidates']} candidates")
+            if counts["duplicates"]:
+                self.log_message(f"Skipped {counts['duplicates']} near-duplicate stories")
+
+            # The best TOP_K that rendered, once every feed is in; spare slots cover failures
+            top = [candidate for candidate in finalists.items() if candidate.get("draft")][:finalists.k]
+            for i, candidate in enumerate(top):
+                self.log_message(f"Processing {i+1}/{len(top)}: {candidate['title'][:50]}...")
+
+                try:
+                    draft_path = aggregator.save_draft(candidate["draft"], candidate["title"], candidate)
+
                     aggregator.mark_seen(candidate["link"], processed=True)
+                    aggregator.near_dups.add(candidate["link"], candidate["signature"])
                     self.log_message(f"  ✓ Draft saved: {draft_path}")
-                    
+
                 except Exception as e:
                     self.log_message(f"  ! Error: {str(e)}")
                     continue
-                    
+            aggregator.seen_index.flush()
+            aggregator.extractor.shutdown()
+            aggregator.image_fetcher.shutdown()
+            self.write_metrics(aggregator)
+            self.write_profile(aggregator)
+
             self.log_message("Processing completed successfully")
             self.update_progress(100)
-            self.update_drafts_list()
-            self.start_btn.config(state=tk.NORMAL)
-            self.stop_btn.config(state=tk.DISABLED)
+            self.call_in_ui(self.update_drafts_list)
+            self.call_in_ui(self.set_running, False)
             
         except Exception as e:
             self.log_message(f"Fatal error: {str(e)}")
-            self.start_btn.config(state=tk.NORMAL)
-            self.stop_btn.config(state=tk.DISABLED)
+            self.call_in_ui(self.set_running, False)
 
 class ContentAggregator:
     def __init__(self, config):
         self.config = config
         self.db_conn = self.connect_db()
+        self.seen_index = SeenIndex(
+            self.db_conn,
+            batch_size=self.config["OUTPUT"].get("SEEN_BATCH_SIZE", 100),
+            bloom_path=Path(self.config["OUTPUT"]["DB_PATH"]).with_suffix(".bloom"),
+        )
         self.ensure_dirs()
         self.session = requests.Session()
         self.user_agents = self.load_user_agents()
         self.cookies = {}
+        settings = self.config["REQUEST_SETTINGS"]
+        self.scheduler = HostScheduler(
+            min_interval=settings.get("HOST_MIN_INTERVAL", settings["THROTTLE_DELAY"]),
+            jitter=settings.get("HOST_JITTER", 0.5),
+        )
+        self.feed_fetcher = FeedFetcher(
+            session=self.session,
+            user_agents=self.user_agents,
+            timeout=settings["TIMEOUT"],
+            concurrency=settings.get("FEED_CONCURRENCY", 16),
+            per_host=settings.get("FEED_PER_HOST", 2),
+        )
+        self.feed_cache = FeedCache(self.db_conn)
+        self.extractor = ExtractionPool(self.config.get("PROCESSING", {}).get("EXTRACT_WORKERS"))
+        self.html_cache = HtmlCache(
+            self.config["OUTPUT"].get("CACHE_DIR", "cache"),
+            max_bytes=self.config["OUTPUT"].get("CACHE_MAX_MB", 256) * 1024 * 1024,
+        )
+        self.drafts = DraftCatalog(self.db_conn)
+        self.metrics = Metrics()
+        self.profiler = Profiler(enabled=False)
+        self.image_fetcher = ImageFetcher(
+            self.session,
+            self.user_agents,
+            self.config["OUTPUT"]["IMAGES_DIR"],
+            conn=self.db_conn,
+            max_bytes=self.config["OUTPUT"].get("MAX_IMAGE_MB", 5) * 1024 * 1024,
+            workers=self.config["OUTPUT"].get("IMAGE_WORKERS", 4),
+            metrics=self.metrics,
+        )
+        self.feed_report = []
+
+    # Opened on first use so runs with nothing new never load NumPy
+    @cached_property
+    def near_dups(self):
+        from near_dup import NearDupIndex
+
+        return NearDupIndex(
+            self.db_conn,
+            threshold=self.config.get("PROCESSING", {}).get("NEAR_DUP_THRESHOLD", 0.5),
+            max_age_days=self.config.get("PROCESSING", {}).get("NEAR_DUP_DAYS", 14),
+        )
+
+    def enable_profiling(self):
+        # Extraction runs in-process so cProfile and the sampler can see it
+        self.profiler = Profiler()
+        self.extractor.workers = 0
 
     def load_user_agents(self):
         return [
@@ -489,6 +759,9 @@ class ContentAggregator:
                 processed BOOLEAN DEFAULT 0
             )
         """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_added_at ON seen(added_at)")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         return conn
 
     def ensure_dirs(self):
@@ -498,17 +771,13 @@ class ContentAggregator:
         Path(images_dir).mkdir(parents=True, exist_ok=True)
 
     def is_seen(self, url):
-        url_hash = hashlib.sha256(url.encode()).hexdigest()
-        cur = self.db_conn.execute("SELECT 1 FROM seen WHERE id=?", (url_hash,))
-        return cur.fetchone() is not None
+        return self.seen_index.is_seen(url)
+
+    def seen_many(self, urls):
+        return self.seen_index.seen_many(urls)
 
     def mark_seen(self, url, processed=False):
-        url_hash = hashlib.sha256(url.encode()).hexdigest()
-        self.db_conn.execute(
-            "INSERT OR IGNORE INTO seen(id, url, added_at, processed) VALUES(?, ?, ?, ?)",
-            (url_hash, url, datetime.now(timezone.utc).isoformat(), processed)
-        )
-        self.db_conn.commit()
+        self.seen_index.mark_seen(url, processed)
 
     @staticmethod
     def domain_of(url):
@@ -524,69 +793,36 @@ class ContentAggregator:
             "User-Agent": random.choice(self.user_agents),
         }
 
+        host = self.domain_of(url)
         for attempt in range(self.config["REQUEST_SETTINGS"]["RETRY_ATTEMPTS"]):
             try:
-                time.sleep(random.uniform(1.0, self.config["REQUEST_SETTINGS"]["THROTTLE_DELAY"]))
-                resp = self.session.get(url, headers=headers, timeout=self.config["REQUEST_SETTINGS"]["TIMEOUT"])
+                self.scheduler.acquire(host)
+                resp = self.session.get(
+                    url, headers=headers, timeout=self.config["REQUEST_SETTINGS"]["TIMEOUT"], stream=True
+                )
+                self.metrics.http_status("article_fetch", resp.status_code)
+                if resp.status_code in (429, 503):
+                    resp.close()
+                    self.scheduler.defer(host, self.scheduler.retry_after(resp.headers, default=2 ** attempt))
+                    raise requests.exceptions.RequestException(f"{resp.status_code} rate limited")
+                if resp.status_code >= 400:
+                    resp.close()
                 resp.raise_for_status()
+                blocked = read_capped(resp, self.config["REQUEST_SETTINGS"].get("MAX_CONTENT_LENGTH", 200000))
+                self.metrics.add_bytes("article_fetch", len(resp.content))
+                if blocked:
+                    raise requests.exceptions.RequestException(blocked)
                 return resp
             except requests.exceptions.RequestException as e:
                 if attempt == self.config["REQUEST_SETTINGS"]["RETRY_ATTEMPTS"] - 1:
+                    self.metrics.host_error("article_fetch", host)
                     raise
-                time.sleep(2 ** attempt)
-
-    def extract_images(self, soup, base_url):
-        images = []
-        max_images = self.config["OUTPUT"]["MAX_IMAGES"]
-        
-        for img in soup.find_all('img'):
-            if len(images) >= max_images:
-                break
-                
-            src = img.get('src') or img.get('data-src')
-            if not src:
-                continue
-                
-            alt = img.get('alt', '').strip()
-            if not alt or len(alt) < 5:
-                continue
-                
-            try:
-                if src.startswith('//'):
-                    src = 'https:' + src
-                elif src.startswith('/'):
-                    src = urljoin(base_url, src)
-                elif not src.startswith(('http://', 'https://')):
-                    src = urljoin(base_url, src)
-                    
-                images.append({'url': src, 'alt': alt})
-            except:
-                continue
-                
-        return images
-
-    def download_image(self, image_url, image_name):
-        try:
-            headers = {
-                "User-Agent": random.choice(self.user_agents),
-                "Accept": "image/webp,image/apng,image/*,*/*;q=0.8",
-                "Referer": "https://www.google.com/"
-            }
-            
-            response = self.session.get(image_url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            images_dir = Path(self.config["OUTPUT"]["IMAGES_DIR"])
-            image_path = images_dir / image_name
-            
-            with open(image_path, 'wb') as f:
-                f.write(response.content)
-                
-            return image_path
-        except Exception as e:
-            return None
+                self.metrics.inc("http_retries", stage="article_fetch")
+                self.scheduler.defer(host, 2 ** attempt)
 
     def parse_date(self, entry):
+        from dateutil import parser as dateparser
+
         date_fields = ["published", "updated", "created", "pubDate"]
         for field in date_fields:
             if hasattr(entry, field):
@@ -596,70 +832,56 @@ class ContentAggregator:
                     continue
         return datetime.now(timezone.utc)
 
-    def freshness_score(self, dt):
-        if not dt:
-            return 0.4
-        age_hours = (datetime.now(timezone.utc) - dt).total_seconds() / 3600
-        return math.exp(-age_hours * math.log(2) / 168)
-
     def keyword_score(self, text):
-        text_lower = text.lower()
-        kw = self.config["KEYWORDS"]
-        
-        if not any(k.lower() in text_lower for k in kw["must_have"]):
-            return 0.0
-            
-        score = 1.0
-        score += 0.2 * sum(1 for k in kw["nice_to_have"] if k.lower() in text_lower)
-        score -= 0.5 * sum(1 for k in kw["avoid"] if k.lower() in text_lower)
-        return max(0.0, min(2.0, score))
+        return keyword_matcher(self.config["KEYWORDS"]).score(text)
 
-    def rank_item(self, entry):
-        title = entry.get("title", "")
-        summary = BeautifulSoup(entry.get("summary", ""), "html.parser").get_text(" ")
-        url = entry.get("link", "")
-        host = self.domain_of(url)
-        dt = self.parse_date(entry)
+    def rank_batch(self, entries, now=None):
+        from ranking import BatchRanker
 
-        text = f"{title}\n\n{summary}"
-        ks = self.keyword_score(text)
-        fs = self.freshness_score(dt)
-        sw = self.config.get("SOURCE_WEIGHTS", {}).get(host, 1.0)
+        ranker = BatchRanker(
+            self.config["KEYWORDS"], self.config.get("SOURCE_WEIGHTS", {}), self.domain_of, self.parse_date
+        )
+        return ranker.scores(entries, now).tolist()
 
-        return (0.6 * ks) + (0.3 * fs) + (0.1 * sw)
+    def rank_item(self, entry):
+        return self.rank_batch([entry])[0]
 
-    def extract_readable(self, url):
+    def extract_readable(self, url, offline=False):
         try:
-            resp = self.safe_get(url)
-            doc = Document(resp.text)
-            title = doc.title() or ""
-            soup = BeautifulSoup(doc.summary(), "html.parser")
-            
-            for tag in ["script", "style", "nav", "footer", "form", "iframe", "aside"]:
-                for element in soup.find_all(tag):
-                    element.decompose()
-                    
-            text = soup.get_text("\n", strip=True)
-            text = re.sub(r"\n{3,}", "\n\n", text)
-            
-            if len(text) < self.config["REQUEST_SETTINGS"]["MIN_CONTENT_LENGTH"]:
-                return {"ok": False, "error": "Content too short", "text": text, "title": title}
-                
-            images = self.extract_images(soup, url)
-                
-            return {
-                "ok": True,
-                "title": title,
-                "text": text,
-                "markdown": md(str(soup)),
-                "url": url,
-                "images": images
-            }
-            
+            cached = self.html_cache.get(url)
+            self.metrics.cache_lookup("html", cached is not None)
+            if cached:
+                content, encoding = cached
+            elif offline:
+                return {"ok": False, "error": "Not in cache", "text": "", "title": ""}
+            else:
+                with self.metrics.timer("article_fetch"):
+                    resp = self.safe_get(url)
+                content, encoding = resp.content, header_charset(resp.headers.get("Content-Type"))
+                self.html_cache.put(url, content, encoding)
+
+            future = self.extractor.submit(
+                content,
+                url,
+                encoding,
+                min_length=self.config["REQUEST_SETTINGS"]["MIN_CONTENT_LENGTH"],
+                max_images=self.config["OUTPUT"]["MAX_IMAGES"],
+                target_width=self.config["OUTPUT"].get("IMAGE_TARGET_WIDTH", 800),
+            )
+            result = future.result()
+            for stage, seconds in result.get("timings", {}).items():
+                self.metrics.observe(stage, seconds)
+            return result
+
         except Exception as e:
             return {"ok": False, "error": str(e), "text": "", "title": ""}
 
     def simple_summarize(self, text):
+        if self.config.get("PROCESSING", {}).get("SUMMARIZER", "heuristic") == "textrank":
+            from textrank import TextRankSummarizer
+
+            return TextRankSummarizer(keyword_matcher(self.config["KEYWORDS"])).summarize(text)
+
         sentences = re.split(r"(?<=[.!?])\s+", text)
         if len(sentences) < 3:
             return text[:500], text
@@ -680,16 +902,21 @@ class ContentAggregator:
         link = entry.get("link", "")
         domain = self.domain_of(link)
         
-        summary, bullets = self.simple_summarize(extracted.get("text", ""))
-        
+        # Images download in the background while the text is summarised
+        images = extracted.get("images", [])[:self.config["OUTPUT"]["MAX_IMAGES"]]
+        image_futures = self.image_fetcher.fetch_all([img["url"] for img in images])
+
+        with self.metrics.timer("summarize"):
+            summary, bullets = self.simple_summarize(extracted.get("text", ""))
+
         image_markdown = ""
-        if extracted.get("images"):
+        if images:
             image_markdown = "\n\n## Images\n\n"
-            for i, img in enumerate(extracted["images"][:self.config["OUTPUT"]["MAX_IMAGES"]]):
-                image_name = f"{hashlib.md5(img['url'].encode()).hexdigest()[:10]}.jpg"
-                downloaded_path = self.download_image(img['url'], image_name)
+            for img, future in zip(images, image_futures):
+                downloaded_path = future.result()
+                self.image_fetcher.record(img["url"], downloaded_path)
                 if downloaded_path:
-                    image_markdown += f"![{img['alt']}](./{self.config['OUTPUT']['IMAGES_DIR']}/{image_name})\n\n"
+                    image_markdown += f"![{img['alt']}](./{self.config['OUTPUT']['IMAGES_DIR']}/{downloaded_path.name})\n\n"
         
         body = f"""# {title}
 
@@ -704,6 +931,8 @@ class ContentAggregator:
 ---
 *Source: [{domain}]({link}). Automatically summarized for educational purposes.*
 """
+        import frontmatter
+
         post = frontmatter.Post(body)
         post.metadata.update({
             "title": title,
@@ -715,41 +944,161 @@ class ContentAggregator:
         
         return frontmatter.dumps(post)
 
-    def save_draft(self, content, title):
+    def save_draft(self, content, title, entry=None):
         safe_title = re.sub(r'[^\w\s-]', '', title).strip().lower()
         safe_title = re.sub(r'[-\s]+', '-', safe_title)[:50]
         filename = f"{datetime.now().strftime('%Y%m%d')}-{safe_title}.md"
         filepath = Path(self.config["OUTPUT"]["OUT_DIR"]) / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
+        with self.metrics.timer("draft_write"), open(filepath, 'w', encoding='utf-8') as f:
             f.write(content)
-            
+
+        entry = entry or {}
+        link = entry.get("link", "")
+        self.drafts.add(filepath, title, content, url=link, source=self.domain_of(link), score=entry.get("score"))
         return str(filepath)
 
-    def fetch_candidates(self):
-        candidates = []
-        
-        for source in self.config["SOURCES"]:
-            try:
-                feed = feedparser.parse(source)
-                if feed.bozo and feed.bozo_exception:
+    def fetch_feed(self, source, validators=None):
+        result = self.feed_fetcher.fetch_limited(source, validators)
+        self.feed_report.append(result)
+        return result
+
+    def parse_feed(self, result):
+        import feedparser
+
+        self.record_feed_metrics(result)
+        if not result["ok"] or result["not_modified"]:
+            return []
+
+        with self.metrics.timer("feed_parse"):
+            feed = feedparser.parse(result["content"], response_headers=result["headers"])
+        # The raw bytes are not needed again; don't keep every feed in memory until the run ends
+        result["content"] = b""
+        if feed.bozo and feed.bozo_exception:
+            self.metrics.host_error("feed_parse", self.domain_of(result["source"]))
+            result["ok"] = False
+            result["error"] = f"Parse error: {feed.bozo_exception}"
+            return []
+
+        result["entries"] = len(feed.entries)
+        return [
+            {
+                "title": entry.get("title", ""),
+                "summary": entry.get("summary", ""),
+                # Feedburner wraps links in redirects; prefer the original URL
+                "link": entry.get("feedburner_origlink") or entry.get("link", ""),
+                "entry": entry,
+            }
+            for entry in feed.entries if entry.get("link")
+        ]
+
+    def build_pipeline(self, validators, finalists, counts, stop_event=None):
+        # dedup and select read state.db and keep the run's bookkeeping, so they
+        # run on the calling thread; so does render, as images are recorded in state.db
+        settings = self.config["REQUEST_SETTINGS"]
+        processing = self.config.get("PROCESSING", {})
+        queue_size = processing.get("QUEUE_SIZE", 64)
+        self.feed_report = []
+        run_links = set()
+        # Every feed's entries are aged against the same moment
+        now = time.time()
+        clusters = []
+
+        def fetch(source):
+            return [self.fetch_feed(source, validators.get(source))]
+
+        def parse(result):
+            # One batch per feed, so dedup looks a whole feed up in the seen index at once
+            return [self.parse_feed(result)]
+
+        def dedup(candidates):
+            counts["candidates"] += len(candidates)
+            with self.metrics.timer("dedup"):
+                seen = self.seen_many([candidate["link"] for candidate in candidates])
+            fresh = []
+            for candidate in candidates:
+                # The same article is often listed by more than one feed
+                if candidate["link"] in seen or candidate["link"] in run_links:
                     continue
-                    
-                for entry in feed.entries:
-                    if not entry.get("link"):
-                        continue
-                        
-                    candidates.append({
-                        "title": entry.get("title", ""),
-                        "summary": entry.get("summary", ""),
-                        "link": entry.get("link", ""),
-                        "entry": entry,
-                    })
-                    
-            except Exception:
-                continue
-                
-        return candidates
+                run_links.add(candidate["link"])
+                fresh.append(candidate)
+            # Still one batch, so the whole feed is ranked in one go
+            return [fresh] if fresh else []
+
+        def score(candidates):
+            with self.metrics.timer("rank"):
+                scores = self.rank_batch([candidate.pop("entry") for candidate in candidates], now)
+            passed = []
+            for candidate, value in zip(candidates, scores):
+                candidate["score"] = value
+                if value > 0.5:
+                    passed.append(candidate)
+            return passed
+
+        def select(candidate):
+            if not clusters:
+                from near_dup import RunClusters
+                clusters.append(RunClusters(self.near_dups))
+            # Keep only the best-scoring copy of each syndicated story
+            with self.metrics.timer("dedup"):
+                accepted, replaced = clusters[0].offer(candidate)
+            outputs = []
+            if replaced is not None:
+                counts["duplicates"] += 1
+                backfill = finalists.remove(replaced)
+                if backfill is not None:
+                    self.metrics.inc("topk_backfills", reason="duplicate")
+                    outputs.append(backfill)
+            if not accepted:
+                counts["duplicates"] += 1
+                return outputs
+            admitted, _ = finalists.offer(candidate)
+            if admitted:
+                outputs.append(candidate)
+            return outputs
+
+        def extract(candidate):
+            # A better candidate may have pushed it out while it waited. On
+            # failure the best candidate outside the window takes the slot.
+            outputs = []
+            while candidate is not None and finalists.holds(candidate):
+                # Candidates back from the reserve may have been extracted already
+                if not candidate.get("draft") and "extracted" not in candidate:
+                    candidate["extracted"] = self.profiler.wrap(self.extract_readable)(candidate["link"])
+                outputs.append(candidate)
+                if candidate.get("draft") or candidate["extracted"]["ok"]:
+                    break
+                candidate = finalists.remove(candidate)
+                if candidate is not None:
+                    self.metrics.inc("topk_backfills", reason="extract")
+            return outputs
+
+        def render(candidate):
+            if not candidate.get("draft") and candidate["extracted"]["ok"] and finalists.holds(candidate):
+                candidate["draft"] = self.make_draft(candidate, candidate["extracted"])
+            return [candidate]
+
+        return Pipeline([
+            Stage("fetch", fetch, settings.get("FEED_CONCURRENCY", 16), queue_size),
+            Stage("parse", parse, processing.get("PARSE_WORKERS", 2), queue_size),
+            Stage("dedup", dedup, 0, queue_size),
+            Stage("score", score, processing.get("SCORE_WORKERS", 2), queue_size),
+            Stage("select", select, 0, queue_size),
+            # Best-scoring candidates are downloaded first
+            Stage("extract", extract, settings.get("ARTICLE_WORKERS", 8), queue_size,
+                  priority=lambda candidate: -candidate["score"]),
+            Stage("render", render, 0, queue_size),
+        ], stop_event, self.profiler)
+
+    def record_feed_metrics(self, result):
+        self.metrics.observe("feed_fetch", result["elapsed"])
+        if result["status"]:
+            self.metrics.http_status("feed_fetch", result["status"])
+        if result["ok"]:
+            self.metrics.add_bytes("feed_fetch", len(result["content"]))
+            self.metrics.cache_lookup("feed", result["not_modified"])
+        else:
+            self.metrics.host_error("feed_fetch", self.domain_of(result["source"]))
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,208 @@
+"""
+Opt-in profiling for aggregator runs (--profile, or the GUI's Tools menu).
+
+Three views of the same run are written next to the drafts:
+
+    profile-<stamp>.pstats      cProfile data, merged across pipeline threads
+    profile-<stamp>.collapsed   sampled stacks of every thread, one
+                                "frame;frame;frame count" line per stack, for
+                                flamegraph.pl, speedscope or inferno
+    profile-<stamp>.memory.json tracemalloc peak and retained bytes per stage,
+                                and time and memory growth per pipeline stage
+
+cProfile only sees the thread that enabled it, so work handed to thread
+pools is wrapped with Profiler.wrap. Pipeline stages run concurrently, so
+each of their items is measured with the cheaper Profiler.step and the
+results are summed per stage. The sampler walks sys._current_frames()
+on a timer and therefore also shows where threads sit waiting on the
+network.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# How many of the fastest-growing allocation sites to keep per stage
+TOP_ALLOCATIONS = 10
+
+
+class Profiler:
+    """cProfile, a stack sampler and tracemalloc for one run; a no-op when disabled."""
+
+    def __init__(self, enabled: bool = True, interval: float = 0.005):
+        """Initialize with the sampling interval in seconds."""
+        self.enabled = enabled
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.profile = None
+        self.thread_profiles = []
+        self.samples = Counter()
+        self.stages = []
+        self.steps = {}
+        self.stop_event = threading.Event()
+        self.sampler = None
+
+    def start(self):
+        """Start profiling; cProfile follows the calling thread."""
+        if not self.enabled:
+            return
+        self.thread_profiles = []
+        self.samples = Counter()
+        self.stages = []
+        self.steps = {}
+        tracemalloc.start()
+        self.stop_event.clear()
+        self.sampler = threading.Thread(target=self.sample, name="profiler-sampler", daemon=True)
+        self.sampler.start()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        """Stop all three profilers, keeping what they collected."""
+        if not self.enabled or self.profile is None:
+            return
+        self.profile.disable()
+        self.stop_event.set()
+        self.sampler.join()
+        tracemalloc.stop()
+
+    def wrap(self, fn):
+        """Return fn profiled by its own cProfile in whichever thread runs it."""
+        if not self.enabled:
+            return fn
+
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Newer Pythons allow one active profiler; the sampler still sees this thread
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self.lock:
+                    self.thread_profiles.append(profile)
+        return profiled
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record tracemalloc peak and retained memory of the enclosed block.
+
+        The peak is process-wide, so it includes anything other threads
+        allocate while the stage runs.
+        """
+        if not self.enabled or not tracemalloc.is_tracing():
+            yield
+            return
+        baseline = self.snapshot()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            # A run stopped part-way may already have switched tracemalloc off
+            if tracemalloc.is_tracing():
+                self.record_stage(name, baseline, before, started)
+
+    @contextmanager
+    def step(self, name: str):
+        """Add the enclosed block's time and memory growth to the totals of pipeline stage name.
+
+        Cheap enough to wrap every item a stage handles. tracemalloc is
+        process-wide and stages overlap, so the growth also counts whatever
+        other stages allocated at the same time.
+        """
+        if not self.enabled or not tracemalloc.is_tracing():
+            yield
+            return
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            grown = tracemalloc.get_traced_memory()[0] - before if tracemalloc.is_tracing() else 0
+            with self.lock:
+                totals = self.steps.setdefault(
+                    name, {"stage": name, "items": 0, "seconds": 0.0, "retained_bytes": 0, "max_item_bytes": 0}
+                )
+                totals["items"] += 1
+                totals["seconds"] += seconds
+                totals["retained_bytes"] += grown
+                totals["max_item_bytes"] = max(totals["max_item_bytes"], grown)
+
+    @staticmethod
+    def snapshot():
+        """tracemalloc snapshot without the profiler's own allocations."""
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        )
+
+    def record_stage(self, name: str, baseline, before: int, started: float):
+        """Append one stage's timing, memory peak and the sites that grew the most."""
+        current, peak = tracemalloc.get_traced_memory()
+        growth = self.snapshot().compare_to(baseline, "lineno")
+        self.stages.append({
+            "stage": name,
+            "seconds": round(time.perf_counter() - started, 4),
+            "peak_bytes": peak,
+            "peak_above_start_bytes": peak - before,
+            "retained_bytes": current - before,
+            "top_retained": [
+                {"site": str(stat.traceback[0]), "bytes": stat.size_diff, "blocks": stat.count_diff}
+                for stat in growth[:TOP_ALLOCATIONS]
+            ],
+        })
+
+    def sample(self):
+        """Count the current stack of every other thread until stopped."""
+        own = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            # Pool workers differ only by a numeric suffix; merge them into one root
+            names = {thread.ident: re.sub(r"_\d+$", "", thread.name) for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread"))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, directory: str) -> list:
+        """Write the pstats, collapsed-stack and memory files; return their paths."""
+        if not self.enabled or self.profile is None:
+            return []
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        base = directory / f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+        stats = pstats.Stats(self.profile)
+        for profile in self.thread_profiles:
+            stats.add(profile)
+        stats.dump_stats(f"{base}.pstats")
+
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+        with open(f"{base}.memory.json", "w", encoding="utf-8") as f:
+            steps = [dict(totals, seconds=round(totals["seconds"], 4)) for totals in self.steps.values()]
+            json.dump({"stages": self.stages, "pipeline_stages": steps}, f, indent=2)
+
+        return [Path(f"{base}{suffix}") for suffix in (".pstats", ".collapsed", ".memory.json")]
@@ -0,0 +1,129 @@
+"""
+Columnar batch ranking of feed candidates.
+
+A feed's entries are turned into column arrays first: publish timestamps,
+source weights and per-category keyword hit counts. Freshness, keyword and
+source scores are then NumPy expressions over the whole batch with a single
+shared "now", instead of a BeautifulSoup parse, a dateutil parse and a
+datetime.now() call per entry.
+
+Timestamps come from the struct_time feedparser already parsed
+(published_parsed and friends); dateutil is only used for a date string
+feedparser could not read. Summaries are reduced to text with a regex,
+which is all keyword matching needs.
+"""
+
+import calendar
+import html
+import math
+import re
+import time
+from datetime import timezone
+
+import numpy as np
+
+from keyword_matcher import keyword_matcher
+
+# Checked in this order, like parse_date; feedparser files RSS pubDate under published
+DATE_FIELDS = ("published", "updated", "created", "pubDate")
+# Markup get_text(" ") leaves out (comments, scripts, styles), then any other tag
+MARKUP = re.compile(r"<!--.*?-->|<(script|style)\b.*?</\1\s*>|<[^>]*>", re.S | re.I)
+HALF_LIFE_HOURS = 168  # 7 days
+WEIGHTS = {"keyword": 0.6, "freshness": 0.3, "source": 0.1}
+
+
+def strip_tags(markup: str) -> str:
+    """Text of an HTML fragment, with a space wherever a tag was."""
+    if "<" not in markup and "&" not in markup:
+        return markup
+    return html.unescape(MARKUP.sub(" ", markup))
+
+
+def entry_timestamp(entry, parse_date=None) -> float:
+    """POSIX time an entry was published, or NaN when it has no usable date.
+
+    parse_date(entry) is the fallback for date strings feedparser could not
+    parse; naive results are taken as UTC.
+    """
+    for field in DATE_FIELDS:
+        parsed = entry.get(f"{field}_parsed")
+        if parsed:
+            return float(calendar.timegm(parsed))
+        if parse_date is not None and entry.get(field):
+            dt = parse_date(entry)
+            if dt is None:
+                break
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.timestamp()
+    return math.nan
+
+
+class BatchRanker:
+    """Score many feed entries at once; higher is better."""
+
+    def __init__(self, keywords: dict, source_weights: dict, domain_of, parse_date=None):
+        """Initialize with the KEYWORDS and SOURCE_WEIGHTS config, a URL-to-host function and a date fallback."""
+        self.matcher = keyword_matcher(keywords)
+        self.source_weights = source_weights or {}
+        self.domain_of = domain_of
+        self.parse_date = parse_date
+
+    def columns(self, entries: list) -> dict:
+        """Column arrays for entries: timestamp, source weight and keyword hits per category."""
+        n = len(entries)
+        timestamps = np.empty(n)
+        weights = np.empty(n)
+        must_have = np.zeros(n, dtype=np.int32)
+        nice_to_have = np.zeros(n, dtype=np.int32)
+        avoid = np.zeros(n, dtype=np.int32)
+        host_weights = {}
+        for i, entry in enumerate(entries):
+            # Everything up to the third slash still holds the whole host, and
+            # a feed's links share it, so each host is parsed and looked up once
+            prefix = "/".join(str(entry.get("link", "")).split("/", 3)[:3])
+            if prefix not in host_weights:
+                host_weights[prefix] = self.source_weights.get(self.domain_of(prefix), 1.0)
+            weights[i] = host_weights[prefix]
+            try:
+                timestamps[i] = entry_timestamp(entry, self.parse_date)
+                text = f"{entry.get('title', '')}\n\n{strip_tags(entry.get('summary', ''))}"
+                counts = self.matcher.counts(text)
+            except Exception:
+                # One malformed entry must not sink the rest of its feed; it
+                # is ranked with no date and no keyword hits instead
+                timestamps[i] = math.nan
+                continue
+            must_have[i] = counts["must_have"]
+            nice_to_have[i] = counts["nice_to_have"]
+            avoid[i] = counts["avoid"]
+        return {
+            "timestamp": timestamps,
+            "source_weight": weights,
+            "must_have": must_have,
+            "nice_to_have": nice_to_have,
+            "avoid": avoid,
+        }
+
+    @staticmethod
+    def score_columns(columns: dict, now: float = None) -> np.ndarray:
+        """Scores of a batch from its columns, with every age measured from the same now."""
+        now = time.time() if now is None else now
+        # Entries without a date count as published just now, as parse_date has them
+        timestamps = np.where(np.isnan(columns["timestamp"]), now, columns["timestamp"])
+        # Entries dated in the future count as brand new rather than fresher than fresh
+        age_hours = np.maximum(now - timestamps, 0) / 3600
+        freshness = np.exp(-age_hours * (math.log(2) / HALF_LIFE_HOURS))
+
+        keyword = np.clip(1.0 + 0.2 * columns["nice_to_have"] - 0.5 * columns["avoid"], 0.0, 2.0)
+        keyword = np.where(columns["must_have"] > 0, keyword, 0.0)
+
+        return (
+            WEIGHTS["keyword"] * keyword
+            + WEIGHTS["freshness"] * freshness
+            + WEIGHTS["source"] * columns["source_weight"]
+        )
+
+    def scores(self, entries: list, now: float = None) -> np.ndarray:
+        """Score entries as one batch; now defaults to the current time."""
+        return self.score_columns(self.columns(entries), now)
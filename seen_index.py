@@ -0,0 +1,232 @@
+"""
+Bulk access to the seen table in state.db.
+
+Candidates are checked against seen in one query per batch instead of one
+round trip each, and mark_seen rows are buffered and written in a single
+transaction once the buffer fills up or the run flushes it.
+
+URLs are canonicalised before hashing so tracking parameters, http/https and
+trailing slashes do not make an article look new. A Bloom filter persisted
+next to the database answers most lookups in memory; only possible hits are
+confirmed against the seen table.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Stay well below SQLite's host parameter limit for IN (...) queries
+QUERY_CHUNK = 500
+
+# Bump when canonical_url changes so existing seen rows are re-keyed
+SCHEMA_VERSION = 2
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid",
+    "ref", "ref_src", "ncid", "cmpid", "sr_share", "guccounter", "_hsenc", "_hsmi",
+}
+
+
+def canonical_url(url: str) -> str:
+    """Normalise a URL so trivially different links hash the same."""
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        # .port raises for out-of-range or non-numeric ports
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    original_scheme = parts.scheme.lower()
+    scheme = "https" if original_scheme in ("http", "https") else original_scheme
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    # Only a scheme's own default port is redundant
+    if (original_scheme, port) in (("http", 80), ("https", 443)):
+        port = None
+    netloc = f"{host}:{port}" if port else host
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ""))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hex SHA-256 ids."""
+
+    HEADER = struct.Struct("<8sQdIQQQ")
+    MAGIC = b"SEENBLM1"
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """Size the bit array for capacity items at the given false-positive rate."""
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.nbits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.nbits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.nbits + 7) // 8)
+        self.count = 0
+        self.last_rowid = 0
+
+    def _positions(self, item_id: str):
+        """Derive bit positions from the id with double hashing."""
+        digest = bytes.fromhex(item_id)
+        h1, h2 = struct.unpack_from("<QQ", digest)
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.nbits
+
+    def add(self, item_id: str):
+        """Add an id to the filter."""
+        for pos in self._positions(item_id):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item_id: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item_id))
+
+    def save(self, path: Path):
+        """Write the filter atomically to path."""
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(
+                self.MAGIC, self.capacity, self.error_rate, self.hashes,
+                self.nbits, self.count, self.last_rowid
+            ))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path):
+        """Read a filter written by save(), or return None if unusable."""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(cls.HEADER.size)
+                magic, capacity, error_rate, hashes, nbits, count, last_rowid = cls.HEADER.unpack(header)
+                if magic != cls.MAGIC:
+                    return None
+                bloom = cls(capacity, error_rate)
+                if (bloom.hashes, bloom.nbits) != (hashes, nbits):
+                    return None
+                bits = f.read()
+                if len(bits) != len(bloom.bits):
+                    return None
+        except (OSError, struct.error):
+            return None
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        bloom.last_rowid = last_rowid
+        return bloom
+
+
+class SeenIndex:
+    """Batched lookups and write-behind inserts for seen URLs."""
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = 100,
+                 bloom_path: str = None, bloom_capacity: int = 1_000_000, read_only: bool = False):
+        """Initialize with an open state.db connection and flush threshold.
+
+        A read_only index is for lookups only; old rows are not re-keyed, so
+        any awaiting a migration are missed until the next normal run.
+        """
+        self.conn = conn
+        self.batch_size = max(1, int(batch_size))
+        self.pending = {}
+        self.bloom_path = Path(bloom_path) if bloom_path else None
+        if not read_only:
+            self.migrate()
+        self.bloom = self.load_bloom(bloom_capacity)
+
+    @staticmethod
+    def url_id(url: str) -> str:
+        """Return the primary key used for a URL in the seen table."""
+        return hashlib.sha256(canonical_url(url).encode()).hexdigest()
+
+    def migrate(self):
+        """Re-key rows written before URL canonicalisation."""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        rows = self.conn.execute("SELECT url, added_at, processed FROM seen").fetchall()
+        with self.conn:
+            self.conn.execute("DELETE FROM seen")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen(id, url, added_at, processed) VALUES(?, ?, ?, ?)",
+                [(self.url_id(url), canonical_url(url), added_at, processed)
+                 for url, added_at, processed in rows]
+            )
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        if self.bloom_path and self.bloom_path.exists():
+            self.bloom_path.unlink()
+
+    def load_bloom(self, capacity: int) -> BloomFilter:
+        """Load the persisted filter and add any rows written since it was saved."""
+        bloom = BloomFilter.load(self.bloom_path) if self.bloom_path else None
+        max_rowid = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM seen").fetchone()[0]
+        if bloom is None or bloom.last_rowid > max_rowid:
+            bloom = BloomFilter(capacity)
+        return self.catch_up(bloom)
+
+    def catch_up(self, bloom: BloomFilter) -> BloomFilter:
+        """Add rows newer than the filter's last rowid, growing it when full."""
+        cur = self.conn.execute("SELECT rowid, id FROM seen WHERE rowid > ?", (bloom.last_rowid,))
+        for rowid, url_hash in cur:
+            bloom.add(url_hash)
+            bloom.last_rowid = max(bloom.last_rowid, rowid)
+
+        if bloom.count > bloom.capacity:
+            bloom = self.catch_up(BloomFilter(bloom.count * 2, bloom.error_rate))
+        return bloom
+
+    def seen_many(self, urls: list) -> set:
+        """Return the subset of urls that are already in seen (or pending)."""
+        ids = {}
+        for url in urls:
+            ids.setdefault(self.url_id(url), []).append(url)
+
+        found = {url_hash for url_hash in ids if url_hash in self.pending}
+        # Only ids the Bloom filter might contain need a trip to the database
+        maybe = [url_hash for url_hash in ids if url_hash not in found and url_hash in self.bloom]
+        for start in range(0, len(maybe), QUERY_CHUNK):
+            chunk = maybe[start:start + QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cur = self.conn.execute(f"SELECT id FROM seen WHERE id IN ({placeholders})", chunk)
+            found.update(row[0] for row in cur)
+
+        return {url for url_hash in found for url in ids[url_hash]}
+
+    def is_seen(self, url: str) -> bool:
+        """Check a single URL."""
+        return bool(self.seen_many([url]))
+
+    def mark_seen(self, url: str, processed: bool = False):
+        """Buffer a seen row, flushing once batch_size rows are pending."""
+        self.pending[self.url_id(url)] = (canonical_url(url), datetime.now(timezone.utc).isoformat(), processed)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all pending rows in one transaction and persist the filter."""
+        if not self.pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen(id, url, added_at, processed) VALUES(?, ?, ?, ?)",
+                [(url_hash, *row) for url_hash, row in self.pending.items()]
+            )
+        self.pending.clear()
+        self.bloom = self.catch_up(self.bloom)
+        if self.bloom_path:
+            self.bloom.save(self.bloom_path)
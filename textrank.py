@@ -0,0 +1,160 @@
+"""
+Vectorized TextRank summarizer.
+
+Sentences become TF-IDF rows of a sparse term matrix held as NumPy COO arrays.
+Cosine-similarity TextRank is run by power iteration without ever building the
+sentence-by-sentence matrix (S v = X (X^T v)), then boosted by per-sentence
+keyword scores from one pass of the compiled keyword matcher. The top sentences
+are picked with argpartition instead of a full sort. Offline and CPU-only.
+"""
+
+import re
+from itertools import chain, repeat
+
+import numpy as np
+
+from keyword_matcher import CATEGORIES, KeywordMatcher
+
+# Same boundaries as re.split(r"(?<=[.!?])\s+"), but a leading character class
+# lets the regex engine skip ahead instead of testing a lookbehind everywhere
+SENTENCE_END = re.compile(r"[.!?]\s+")
+# Characters stripped from token edges; kept short because str.strip scans it per character
+PUNCTUATION = ".,;:!?\"'()[]\u2018\u2019\u201c\u201d"
+
+
+def split_sentences(text: str) -> tuple:
+    """Split text like simple_summarize does, also returning each sentence's offset."""
+    sentences, starts = [], []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.start() + 1])
+        starts.append(start)
+        start = match.end()
+    sentences.append(text[start:])
+    starts.append(start)
+    return sentences, np.asarray(starts, dtype=np.int64)
+
+
+class TextRankSummarizer:
+    """Rank sentences by centrality plus keyword relevance."""
+
+    def __init__(self, matcher: KeywordMatcher = None, damping: float = 0.85,
+                 iterations: int = 30, tolerance: float = 1e-4, keyword_weight: float = 1.0):
+        """Initialize with an optional keyword matcher and TextRank parameters."""
+        self.matcher = matcher
+        self.damping = damping
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.keyword_weight = keyword_weight
+
+    @staticmethod
+    def term_matrix(sentences: list) -> tuple:
+        """Return (rows, cols, weights) of the L2-normalised TF-IDF matrix."""
+        n = len(sentences)
+        tokens = [sentence.split() for sentence in sentences]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=n)
+        total = int(lengths.sum())
+
+        # Term ids from hashes of punctuation-stripped tokens keep tokenising
+        # and the vocabulary build in C; hash("") == 0 marks pure punctuation
+        words = map(str.strip, chain.from_iterable(tokens), repeat(PUNCTUATION))
+        hashes = np.fromiter(map(hash, words), dtype=np.int64, count=total)
+        rows = np.repeat(np.arange(n), lengths)
+        keep = hashes != 0
+        if not keep.any():
+            empty = np.zeros(0)
+            return empty.astype(np.int64), empty.astype(np.int64), empty
+        _, cols = np.unique(hashes[keep], return_inverse=True)
+        cols = cols.reshape(-1)
+        rows = rows[keep]
+
+        # Collapse repeated (sentence, term) pairs into term frequencies
+        n_terms = int(cols.max()) + 1
+        keys, tf = np.unique(rows * n_terms + cols, return_counts=True)
+        rows, cols = keys // n_terms, keys % n_terms
+
+        df = np.bincount(cols, minlength=n_terms)
+        weights = tf * np.log((1 + n) / (1 + df[cols])) + 1e-9
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n))
+        weights = weights / norms[rows]
+        return rows, cols, weights
+
+    def centrality(self, n: int, rows: np.ndarray, cols: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """TextRank scores over the implicit cosine-similarity graph."""
+        n_terms = int(cols.max()) + 1 if len(cols) else 0
+
+        def similarity_dot(v):
+            # (X X^T - diag) v, with X given by (rows, cols, weights)
+            term_totals = np.bincount(cols, weights=weights * v[rows], minlength=n_terms)
+            sv = np.bincount(rows, weights=weights * term_totals[cols], minlength=n)
+            return sv - self_similarity * v
+
+        self_similarity = np.bincount(rows, weights=weights ** 2, minlength=n)
+        degree = similarity_dot(np.ones(n))
+        degree[degree <= 0] = 1.0
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(self.iterations):
+            updated = (1 - self.damping) / n + self.damping * similarity_dot(rank / degree)
+            if np.abs(updated - rank).sum() < self.tolerance:
+                rank = updated
+                break
+            rank = updated
+        return rank
+
+    def keyword_scores(self, lowered: str, starts: np.ndarray) -> np.ndarray:
+        """Per-sentence keyword_score values from a single scan of the lowercased text."""
+        n = len(starts)
+        if self.matcher is None or self.matcher.pattern is None:
+            return np.zeros(n)
+
+        keywords = list(self.matcher.categories)
+        index = {keyword: i for i, keyword in enumerate(keywords)}
+        spans = [(offset, index[keyword]) for offset, keyword in self.matcher.scan(lowered)]
+
+        # present[sentence, keyword]: distinct keywords per sentence, phrases
+        # also counting the shorter keywords they contain
+        present = np.zeros((n, len(keywords)), dtype=bool)
+        if spans:
+            offsets, ids = np.asarray(spans).T
+            present[np.searchsorted(starts, offsets, side="right") - 1, ids] = True
+            contained = np.zeros((len(keywords), len(keywords)), dtype=bool)
+            for keyword, others in self.matcher.contained.items():
+                contained[index[keyword], [index[other] for other in others]] = True
+            if contained.any():
+                present |= (present.astype(np.int32) @ contained.astype(np.int32)) > 0
+
+        counts = {
+            category: present @ np.array([category in self.matcher.categories[k] for k in keywords], dtype=np.int32)
+            for category in CATEGORIES
+        }
+        score = 1.0 + 0.2 * counts["nice_to_have"] - 0.5 * counts["avoid"]
+        score = np.clip(score, 0.0, 2.0)
+        return np.where(counts["must_have"] > 0, score, 0.0)
+
+    def summarize(self, text: str, n_summary: int = 5, n_bullets: int = 3) -> tuple:
+        """Return (summary, bullets) like simple_summarize."""
+        sentences, starts = split_sentences(text)
+        n = len(sentences)
+        if n < 3:
+            return text[:500], text
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Rare case-mappings change the length; re-split so offsets line up
+            lowered_sentences, starts = split_sentences(lowered)
+        else:
+            bounds = np.append(starts[1:], len(text))
+            lowered_sentences = [lowered[start:end] for start, end in zip(starts.tolist(), bounds.tolist())]
+
+        rows, cols, weights = self.term_matrix(lowered_sentences)
+        rank = self.centrality(n, rows, cols, weights)
+        scores = rank * n + self.keyword_weight * self.keyword_scores(lowered, starts) - np.arange(n) / 100
+
+        k = min(max(n_summary, n_bullets), n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        summary = " ".join(sentences[i] for i in top[:n_summary])
+        bullets = "\n".join(f"- {sentences[i]}" for i in top[:n_bullets])
+        return summary, bullets
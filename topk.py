@@ -0,0 +1,107 @@
+"""
+Streaming top-K selection with speculative slots and backfill.
+
+Candidates reach selection one at a time as feeds are parsed and scored.
+The best k + spare of them so far form the window, a min-heap with the
+weakest member on top, so each newcomer is compared against one entry and
+pushes out at most one. Everything in the window is extracted straight away;
+the spare slots cover articles that turn out to be too short, blocked or
+unreachable.
+
+Candidates pushed out of the window, or never let in, wait in a bounded
+reserve. When a window member fails or turns out to duplicate another story,
+the best of them takes its slot, so a run still ends with k drafts when
+some of its first choices fail. The window is shared between the run's
+thread and extraction workers, hence the lock.
+"""
+
+import heapq
+import itertools
+import threading
+
+# Reserve size, in windows, when not given; entries are small candidate dicts
+RESERVE_WINDOWS = 10
+
+
+class StreamingTopK:
+    """Best k + spare items of a stream, with a reserve to backfill removed ones from."""
+
+    def __init__(self, k: int, key, spare: int = 0, reserve: int = None):
+        """Initialize with k, the score function (higher is better) and the number of spare slots.
+
+        reserve bounds how many items outside the window are kept for
+        backfilling; by default RESERVE_WINDOWS times what the window holds.
+        """
+        self.k = max(0, int(k))
+        self.capacity = self.k + max(0, int(spare)) if self.k else 0
+        self.reserve_size = self.capacity * RESERVE_WINDOWS if reserve is None else max(0, int(reserve))
+        self.key = key
+        # (score, -arrival, item): the weakest, and among equals the latest, on top
+        self.window = []
+        # (-score, arrival, item): the strongest, and among equals the earliest, on top
+        self.reserve = []
+        self.members = set()
+        self.arrivals = itertools.count()
+        self.lock = threading.Lock()
+
+    def offer(self, item) -> tuple:
+        """Return (admitted, displaced): whether item joined the window, and whom it pushed into the reserve."""
+        with self.lock:
+            if self.capacity == 0:
+                return False, None
+            entry = (self.key(item), -next(self.arrivals), item)
+            # The window only has room when the reserve is empty; see remove()
+            if len(self.window) < self.capacity:
+                self.admit(entry)
+                return True, None
+            if entry < self.window[0]:
+                self.keep(entry)
+                return False, None
+            displaced = heapq.heapreplace(self.window, entry)
+            self.members.discard(id(displaced[2]))
+            self.members.add(id(item))
+            self.keep(displaced)
+            return True, displaced[2]
+
+    def remove(self, item):
+        """Drop item for good and return what took its slot.
+
+        That is the best item in the reserve, now in the window, or None when
+        item was not in the window or the reserve is empty.
+        """
+        with self.lock:
+            if any(entry[2] is item for entry in self.reserve):
+                self.reserve = [entry for entry in self.reserve if entry[2] is not item]
+                heapq.heapify(self.reserve)
+            if id(item) not in self.members:
+                return None
+            self.members.discard(id(item))
+            self.window = [entry for entry in self.window if entry[2] is not item]
+            heapq.heapify(self.window)
+            if not self.reserve:
+                return None
+            score, arrival, backfill = heapq.heappop(self.reserve)
+            self.admit((-score, -arrival, backfill))
+            return backfill
+
+    def holds(self, item) -> bool:
+        """Whether item is currently in the window."""
+        with self.lock:
+            return id(item) in self.members
+
+    def items(self) -> list:
+        """The window, best first."""
+        with self.lock:
+            return [entry[2] for entry in sorted(self.window, reverse=True)]
+
+    def admit(self, entry: tuple):
+        """Add a window entry."""
+        heapq.heappush(self.window, entry)
+        self.members.add(id(entry[2]))
+
+    def keep(self, entry: tuple):
+        """Move a window entry into the reserve, forgetting the weakest beyond its bound."""
+        score, latest, item = entry
+        heapq.heappush(self.reserve, (-score, -latest, item))
+        if len(self.reserve) > self.reserve_size:
+            self.reserve = heapq.nsmallest(self.reserve_size, self.reserve)